@@ -0,0 +1,172 @@
+"""
+Update throughput of the bot in webhook and in polling mode on one machine.
+
+Starts a fake Bot API server and feeds it recorded updates. Start the bot
+with TELEGRAM_API_SERVER=http://127.0.0.1:8081 and either
+
+  * WEBHOOK_URL=http://127.0.0.1:8080 and any WEBHOOK_SECRET - the bot calls
+    setWebhook and the harness posts the updates to it, with the secret
+    token it was given;
+  * no WEBHOOK_URL - the harness serves the updates from getUpdates.
+
+The clock runs from the first delivered update to the last API call of the
+bot, the run ends when the bot is idle for ``--idle`` seconds.
+
+    python -m benchmarks.webhook_load --updates updates.jsonl --repeat 20
+    python -m benchmarks.webhook_load --synthetic 5000 --text /start
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, Optional
+
+from aiohttp import ClientSession, web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Benchmark", "username": "benchmark_bot"}
+
+
+def load_updates(path: Optional[str], repeat: int, synthetic: int, text: str) -> list[dict]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            recorded = [json.loads(line) for line in f if line.strip()]
+    else:
+        recorded = [{"message": {"message_id": i + 1,
+                                 "date": int(time.time()),
+                                 "chat": {"id": 10_000 + i, "type": "private"},
+                                 "from": {"id": 10_000 + i, "is_bot": False, "first_name": "User"},
+                                 "text": text,
+                                 "entities": [{"type": "bot_command", "offset": 0, "length": len(text)}]
+                                 if text.startswith("/") else []}}
+                    for i in range(synthetic)]
+
+    updates = []
+    for update_id, update in enumerate(itertools.chain.from_iterable([recorded] * repeat), start=1):
+        updates.append({**update, "update_id": update_id})
+    return updates
+
+
+class FakeBotAPI:
+    def __init__(self, updates: list[dict], concurrency: int):
+        self.updates = updates
+        self.concurrency = concurrency
+        self.delivered = 0
+        self.calls = 0
+        self.first_delivery: Optional[float] = None
+        self.last_call: Optional[float] = None
+        self.mode: Optional[str] = None
+        self._webhook_task: Optional[asyncio.Task] = None
+        self._message_ids = itertools.count(1)
+
+    def _mark_delivered(self, count: int) -> None:
+        if count and self.first_delivery is None:
+            self.first_delivery = time.monotonic()
+        self.delivered += count
+
+    def _message(self, params: dict) -> dict:
+        return {"message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", "")}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post()) or dict(request.query)
+
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+        if method == "setWebhook":
+            self._start_webhook(params["url"], params.get("secret_token"))
+            return self._ok(True)
+        if method == "getMe":
+            return self._ok(BOT_USER)
+
+        self.calls += 1
+        self.last_call = time.monotonic()
+        if method.startswith(("send", "edit")):
+            return self._ok(self._message(params))
+        return self._ok(True)
+
+    @staticmethod
+    def _ok(result: Any) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        self.mode = "polling"
+        offset = int(params.get("offset", 0) or 0)
+        limit = int(params.get("limit", 100) or 100)
+        # update_id начинаются с 1, поэтому индекс следующего обновления равен offset - 1
+        start = max(offset - 1, 0)
+        batch = self.updates[start:start + limit]
+        self._mark_delivered(max(start + len(batch) - self.delivered, 0))
+        if not batch:
+            # Новых обновлений не будет, имитируем long polling
+            await asyncio.sleep(1)
+        return batch
+
+    def _start_webhook(self, url: str, secret_token: Optional[str]) -> None:
+        self.mode = "webhook"
+        if self._webhook_task is None:
+            self._webhook_task = asyncio.create_task(self._post_updates(url, secret_token))
+
+    async def _post_updates(self, url: str, secret_token: Optional[str]) -> None:
+        await asyncio.sleep(1)  # даем боту закончить запуск
+        headers = {"X-Telegram-Bot-Api-Secret-Token": secret_token} if secret_token else {}
+        queue = iter(self.updates)
+
+        async def worker(session: ClientSession):
+            for update in queue:
+                async with session.post(url, json=update, headers=headers) as response:
+                    if response.status != 200:
+                        print(f"update {update['update_id']}: HTTP {response.status}")
+                self._mark_delivered(1)
+
+        async with ClientSession() as session:
+            await asyncio.gather(*(worker(session) for _ in range(self.concurrency)))
+
+
+async def main(args: argparse.Namespace) -> None:
+    updates = load_updates(args.updates, args.repeat, args.synthetic, args.text)
+    api = FakeBotAPI(updates, args.concurrency)
+
+    app = web.Application()
+    app.router.add_route("*", "/bot{token}/{method}", api.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"Fake Bot API on http://{args.host}:{args.port}, {len(updates)} updates, waiting for the bot")
+
+    try:
+        while True:
+            await asyncio.sleep(0.5)
+            done = api.delivered >= len(updates)
+            idle = api.last_call is not None and time.monotonic() - api.last_call > args.idle
+            if done and idle:
+                break
+    finally:
+        await runner.cleanup()
+
+    elapsed = api.last_call - api.first_delivery
+    print(f"mode:        {api.mode}")
+    print(f"updates:     {api.delivered}")
+    print(f"api calls:   {api.calls}")
+    print(f"elapsed:     {elapsed:.2f} s")
+    print(f"throughput:  {api.delivered / elapsed:.1f} updates/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", help="JSONL file with recorded Update objects")
+    parser.add_argument("--repeat", type=int, default=1, help="how many times to replay the updates")
+    parser.add_argument("--synthetic", type=int, default=1000,
+                        help="number of generated messages when --updates is not given")
+    parser.add_argument("--text", default="/start", help="text of the generated messages")
+    parser.add_argument("--concurrency", type=int, default=40,
+                        help="parallel webhook connections, Telegram uses up to 40 by default")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--idle", type=float, default=3.0)
+    asyncio.run(main(parser.parse_args()))
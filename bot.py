@@ -1,26 +1,51 @@
 """Main module for the bot."""
+import time
+
+# Холодный старт считаем от запуска процесса, до тяжелых импортов langchain и genai
+PROCESS_STARTED_AT = time.monotonic()
+
 import asyncio
 import logging
+from typing import Any
 
 from aiogram import Bot, Dispatcher, types
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from redis.asyncio import Redis
 from aiogram_dialog import setup_dialogs
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from aiogram_i18n.cores.fluent_runtime_core import FluentRuntimeCore
 from aiogram_i18n import I18nMiddleware
 
+from infrastructure.database.language_catalog import LanguageCatalog
+from infrastructure.database.user_cache import user_cache
 from infrastructure.database.models import ConfigDb
 from infrastructure.database.setup import create_db, dispose_db
 
 from tgbot.middlewares.album_middleware import AlbumMiddleware
+from tgbot.middlewares.chat_order import ChatOrderMiddleware
+from tgbot.middlewares.chat_serial import ChatSerialMiddleware
+from tgbot.middlewares.cold_start import ColdStartMiddleware
 # from tgbot.middlewares.scheduler_middleware import SchedulerMiddleware
 from tgbot.middlewares.localization import LocalizationMiddleware, LocalMiddleware
 from tgbot.config import Config, load_config
 from tgbot.middlewares.config import ConfigMiddleware
+from tgbot.middlewares.services import ServicesMiddleware
 # from tgbot.misc.logging import LoggingPackagePathFilter
 from tgbot.services import broadcaster
+from tgbot.services.api_manager import AIClientsRegistry
+from tgbot.services.llm_metrics import LLMMetrics, MetricsServer
+from tgbot.services.conversation_store import MemoryConversationStore, RedisConversationStore
+from tgbot.services.edit_scheduler import EditScheduler
+from tgbot.services.history_manager import HistoryManager
+from tgbot.services.llm_scheduler import LLMScheduler
+from tgbot.services.translation_cache import TranslationCache
+from tgbot.services.locale_cache import LocaleCache
+from tgbot.services.webhook import WebhookServer
+from tgbot.helpers.utils import get_ai_system_message
 from tgbot.modules import common_router
 
 logger = logging.getLogger(__name__)
@@ -45,11 +70,14 @@ async def on_startup(bot: Bot, admin_ids: list[int]):
 
 def register_global_middlewares(dp: Dispatcher,
                                 config: Config,
+                                services: dict[str, Any],
+                                redis: Redis | None = None,
                                 # scheduler: AsyncIOScheduler,
                                 # session_pool
                                 ):
     middleware_types = [
         ConfigMiddleware(config),
+        ServicesMiddleware(**services),
         # SchedulerMiddleware(scheduler),
     ]
 
@@ -60,7 +88,26 @@ def register_global_middlewares(dp: Dispatcher,
         dp.my_chat_member.outer_middleware(middleware_type)
         # dp.chat_member.outer_middleware(middleware_type)
 
-    dp.message.middleware(AlbumMiddleware())
+    # Несколько реплик: альбомы собираются в Redis
+    shared_redis = redis if config.tg_bot.use_redis else None
+    dp.message.middleware(AlbumMiddleware(redis=shared_redis))
+
+
+def register_ordering_middlewares(dp: Dispatcher,
+                                  config: Config,
+                                  chat_serial: ChatSerialMiddleware,
+                                  redis: Redis | None = None):
+    """
+    Keep the order of updates within a chat.
+
+    Registered before the middlewares that await Redis or the database,
+    otherwise a later update could overtake an earlier one on the way.
+    """
+    # Внутри процесса обновления одного чата идут по очереди, разные чаты - параллельно
+    chat_serial.setup(dp)
+    # Несколько реплик: обновления одного чата идут по очереди на любой реплике
+    if config.tg_bot.use_redis and redis:
+        dp.update.outer_middleware(ChatOrderMiddleware(redis, lease=config.tg_bot.chat_order_lease))
 
 
 def get_storage(config: Config):
@@ -93,6 +140,7 @@ async def restore_config(config: Config):
 
 async def main():
     """Start the project."""
+    started_at = PROCESS_STARTED_AT
     logging.basicConfig(
         level=logging.INFO,
         format=u'%(filename)s:%(lineno)d #%(levelname)-8s [%(asctime)s] - %(name)s - %(message)s',
@@ -101,45 +149,168 @@ async def main():
 
     config = load_config(".env")
     storage = get_storage(config)
+    redis = Redis.from_url(config.redis.dsn()) if config.redis else None
 
+    session = None
+    if config.tg_bot.api_server:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(config.tg_bot.api_server))
     bot = Bot(token=config.tg_bot.token,
+              session=session,
               default=DefaultBotProperties(parse_mode="HTML"))
     dp = Dispatcher(storage=storage)
-    await bot.set_my_commands(commands=bot_commands)
+    chat_serial = ChatSerialMiddleware(max_concurrency=config.tg_bot.update_max_concurrency)
+    register_ordering_middlewares(dp, config, chat_serial, redis)
+    dp.update.outer_middleware(ColdStartMiddleware(started_at))
 
     # We register regular routers
     dp.include_routers(common_router)
     setup_dialogs(dp)
 
-    db_engine = await create_db(config.db)
-
     # scheduler = AsyncIOScheduler()
     # scheduler.start()
+    user_cache.ttl = config.tg_bot.user_cache_ttl
+    local_ttl = None
+    if config.tg_bot.use_redis:
+        # Реплики делят состояние через Redis, локальным копиям доверяем недолго
+        local_ttl = config.tg_bot.replica_cache_ttl
+        user_cache.ttl = min(user_cache.ttl, local_ttl)
+        # Иначе пользователь, зарегистрированный на другой реплике, здесь еще долго "не найден"
+        user_cache.negative_ttl = min(user_cache.negative_ttl, local_ttl)
+    locale_cache = LocaleCache(maxsize=config.tg_bot.locale_cache_size,
+                               redis=redis,
+                               local_ttl=local_ttl)
     i18n = LocalizationMiddleware(
         core=FluentRuntimeCore(
             path="locales/{locale}/LC_MESSAGES"
-        )
+        ),
+        locale_cache=locale_cache
     )
     i18n.setup(dispatcher=dp)
 
-    await restore_config(config)
+    llm_metrics = LLMMetrics()
+    metrics_server = None
+    if config.tg_bot.metrics_port:
+        metrics_server = MetricsServer(llm_metrics,
+                                       host=config.tg_bot.metrics_host,
+                                       port=config.tg_bot.metrics_port,
+                                       extra=[chat_serial])
+        await metrics_server.start()
+
+    ai_clients = AIClientsRegistry(gemini_api_key=config.tg_bot.gemini_api_key,
+                                   proxy_urls=config.tg_bot.proxy_urls,
+                                   openai_api_key=config.tg_bot.openai_api_key,
+                                   openai_model=config.tg_bot.openai_model,
+                                   providers=config.tg_bot.ai_providers,
+                                   hedge=config.tg_bot.ai_hedge,
+                                   hedge_min_delay=config.tg_bot.ai_hedge_min_delay,
+                                   breaker_threshold=config.tg_bot.ai_breaker_threshold,
+                                   breaker_cooldown=config.tg_bot.ai_breaker_cooldown,
+                                   max_attempts=config.tg_bot.ai_max_attempts,
+                                   retry_budget_ratio=config.tg_bot.ai_retry_budget_ratio,
+                                   proxy_health_ttl=config.tg_bot.proxy_health_ttl,
+                                   metrics=llm_metrics)
+    edit_scheduler = EditScheduler(
+        bot, interval=config.tg_bot.edit_interval_ms / 1000)
+    translation_cache = TranslationCache(
+        maxsize=config.tg_bot.translation_cache_size,
+        ttl=config.tg_bot.translation_cache_ttl,
+        redis=redis)
+    history_manager = HistoryManager(
+        max_tokens=config.tg_bot.history_max_tokens)
+    if redis:
+        conversation_store = RedisConversationStore(
+            redis, max_turns=config.tg_bot.history_max_turns)
+    else:
+        conversation_store = MemoryConversationStore(
+            max_turns=config.tg_bot.history_max_turns)
+
+    llm_scheduler = LLMScheduler(
+        max_concurrency=config.tg_bot.llm_max_concurrency,
+        max_queue=config.tg_bot.llm_max_queue)
+
+    broadcast_engine = broadcaster.BroadcastEngine(
+        bot,
+        rate=config.tg_bot.broadcast_rate,
+        concurrency=config.tg_bot.broadcast_concurrency,
+        # Рассылку отправляет одна реплика, за упавшей ее подхватывает другая
+        redis=redis if config.tg_bot.use_redis else None)
+
+    # Справочник языков читается из памяти, перезагружается после /add_languages на всех репликах
+    language_catalog = LanguageCatalog(redis=redis if config.tg_bot.use_redis else None)
+
+    async def init_db():
+        engine = await create_db(config.db)
+        await asyncio.gather(restore_config(config),
+                             language_catalog.load(),
+                             # Продолжаем рассылки, прерванные перезапуском
+                             broadcast_engine.resume())
+        return engine
+
+    # Независимые шаги запуска выполняются параллельно
+    db_engine, *_ = await asyncio.gather(
+        init_db(),
+        bot.set_my_commands(commands=bot_commands),
+        ai_clients.warm_up([get_ai_system_message()]),
+    )
+
+    services = {
+        "ai_clients": ai_clients,
+        "edit_scheduler": edit_scheduler,
+        "translation_cache": translation_cache,
+        "history_manager": history_manager,
+        "conversation_store": conversation_store,
+        "llm_scheduler": llm_scheduler,
+        "broadcast_engine": broadcast_engine,
+        "language_catalog": language_catalog,
+    }
     register_global_middlewares(dp,
                                 config,
+                                services,
+                                redis,
                                 # scheduler
                                 )
 
-    await on_startup(bot, config.tg_bot.admin_ids)
+    language_catalog.start_listening()
+    if config.tg_bot.use_redis:
+        broadcast_engine.spawn(broadcast_engine.watch())
+
+    # Уведомление админов не задерживает запуск
+    broadcast_engine.spawn(on_startup(bot, config.tg_bot.admin_ids))
+    logger.info(f"Startup finished in {time.monotonic() - started_at:.2f} s")
 
     try:
-        await bot.delete_webhook(drop_pending_updates=False)
-        await dp.start_polling(
-            bot,
-            allowed_updates=dp.resolve_used_update_types())
+        if config.tg_bot.webhook_url:
+            webhook_server = WebhookServer(
+                dp,
+                bot,
+                url=config.tg_bot.webhook_url,
+                path=config.tg_bot.webhook_path,
+                host=config.tg_bot.webhook_host,
+                port=config.tg_bot.webhook_port,
+                secret_token=config.tg_bot.webhook_secret,
+                max_in_flight=config.tg_bot.webhook_max_in_flight)
+            await webhook_server.start(allowed_updates=dp.resolve_used_update_types())
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await webhook_server.close()
+        else:
+            await bot.delete_webhook(drop_pending_updates=False)
+            await dp.start_polling(
+                bot,
+                allowed_updates=dp.resolve_used_update_types())
     finally:
+        await edit_scheduler.close()
+        await broadcast_engine.close()
+        await language_catalog.close()
+        await ai_clients.close()
+        if metrics_server:
+            await metrics_server.close()
         await bot.session.close()
         await dispose_db(db_engine)
         await dp.storage.close()
-        await dp.stop_polling()
+        if redis:
+            await redis.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from typing import NamedTuple, Optional
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+
+from .models import Language
+
+logger = logging.getLogger(__name__)
+
+
+class LanguageItem(NamedTuple):
+    id: int
+    code: str
+    title: Optional[str]
+
+
+class LanguageCatalog:
+    """
+    In-memory copy of the ``languages`` table.
+
+    The table is tiny and changes only from /add_languages, so it is loaded
+    once at startup and reloaded explicitly after changes. Plain tuples are
+    kept instead of ORM objects, so the cache does not hold DB sessions.
+    With ``redis`` the reload is announced over pub/sub, so every replica
+    that called ``start_listening`` reloads its copy too.
+    """
+
+    def __init__(self,
+                 redis: Optional[Redis] = None,
+                 channel: str = "language_catalog",
+                 retry_delay: float = 5.0):
+        self.redis = redis
+        self.channel = channel
+        self.retry_delay = retry_delay
+        self._items: list[LanguageItem] = []
+        self._by_id: dict[int, LanguageItem] = {}
+        self._by_code: dict[str, LanguageItem] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def load(self) -> None:
+        with Language.db_session as session:
+            stmt = select(Language.id, Language.code, Language.title).order_by(Language.id)
+            result = await session.execute(stmt)
+            items = [LanguageItem(*row) for row in result]
+
+        self._items = items
+        self._by_id = {item.id: item for item in items}
+        self._by_code = {item.code: item for item in items}
+        logger.info(f"Language catalog loaded: {len(items)} languages")
+
+    async def invalidate(self) -> None:
+        """Reload the catalog after the languages table was changed."""
+        await self.load()
+        if self.redis is not None:
+            await self.redis.publish(self.channel, "reload")
+
+    def start_listening(self) -> None:
+        """Reload the catalog whenever another replica changes the table."""
+        if self.redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self) -> None:
+        reconnect = False
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    if reconnect:
+                        # Пока подписки не было, сообщение об изменении могло потеряться
+                        await self.load()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Language catalog subscription failed")
+            reconnect = True
+            await asyncio.sleep(self.retry_delay)
+
+    def all(self) -> list[LanguageItem]:
+        return self._items
+
+    def get(self, language_id: int) -> Optional[LanguageItem]:
+        return self._by_id.get(language_id)
+
+    def get_by_code(self, code: str) -> Optional[LanguageItem]:
+        return self._by_code.get(code)
@@ -1,4 +1,5 @@
 from .base import Base
+from .broadcasts import Broadcast, BroadcastRecipient
 from .chats import Chat
 from .config import ConfigDb
 from .languages import Language
@@ -9,6 +10,8 @@ from .users import User
 
 __all__ = [
     "Base",
+    "Broadcast",
+    "BroadcastRecipient",
     "Chat",
     "ConfigDb",
     "Language",
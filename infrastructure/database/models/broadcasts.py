@@ -0,0 +1,94 @@
+from typing import Optional
+
+from sqlalchemy import BigInteger, ForeignKey, String, select, update
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Broadcast(Base):
+    __tablename__ = 'broadcasts'
+
+    RUNNING = "running"
+    DONE = "done"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    text: Mapped[str]
+    disable_notification: Mapped[bool] = mapped_column(default=False)
+    status: Mapped[str] = mapped_column(String(16), default=RUNNING, index=True)
+    total: Mapped[int] = mapped_column(BigInteger, default=0)
+    sent: Mapped[int] = mapped_column(BigInteger, default=0)
+    failed: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    __mapper_args__ = {"eager_defaults": True}
+
+    def __repr__(self) -> str:
+        return f"Broadcast: #{self.id} ({self.status})"
+
+    @classmethod
+    async def get_unfinished(cls) -> list["Broadcast"]:
+        with cls.db_session as session:
+            stmt = select(cls).where(cls.status == cls.RUNNING).order_by(cls.id)
+            result = await session.execute(stmt)
+            return list(result.scalars().all())
+
+    @classmethod
+    async def add_progress(cls, broadcast_id: int, sent: int, failed: int):
+        with cls.db_session as session:
+            stmt = (update(cls)
+                    .where(cls.id == broadcast_id)
+                    .values(sent=cls.sent + sent, failed=cls.failed + failed))
+            await session.execute(stmt)
+            await session.commit()
+
+
+class BroadcastRecipient(Base):
+    __tablename__ = 'broadcast_recipients'
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    broadcast_id: Mapped[int] = mapped_column(BigInteger,
+                                              ForeignKey('broadcasts.id',
+                                                         ondelete='CASCADE'),
+                                              primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    status: Mapped[str] = mapped_column(String(16), default=PENDING)
+
+    __mapper_args__ = {"eager_defaults": True}
+
+    def __repr__(self) -> str:
+        return f"BroadcastRecipient: #{self.broadcast_id}:{self.user_id} ({self.status})"
+
+    @classmethod
+    async def add_recipients(cls, broadcast_id: int, user_ids: list[int], chunk_size: int = 5000):
+        await cls.add_many([{"broadcast_id": broadcast_id, "user_id": user_id}
+                            for user_id in user_ids],
+                           chunk_size=chunk_size)
+
+    @classmethod
+    async def get_pending(cls,
+                          broadcast_id: int,
+                          after_user_id: Optional[int] = None,
+                          limit: int = 500) -> list[int]:
+        """Next page of pending recipients ordered by user id (keyset pagination)."""
+        rows = await cls.paginate(cls.user_id,
+                                  after_pk=after_user_id,
+                                  limit=limit,
+                                  key=cls.user_id,
+                                  broadcast_id=broadcast_id,
+                                  status=cls.PENDING)
+        return [row.user_id for row in rows]
+
+    @classmethod
+    async def set_status(cls, broadcast_id: int, user_ids: list[int], status: str):
+        if not user_ids:
+            return
+        with cls.db_session as session:
+            stmt = (update(cls)
+                    .where(cls.broadcast_id == broadcast_id,
+                           cls.user_id.in_(user_ids))
+                    .values(status=status))
+            await session.execute(stmt)
+            await session.commit()
@@ -1,7 +1,8 @@
+import random
 from datetime import timedelta
 from typing import Optional, TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String, BigInteger, func, select
+from sqlalchemy import ForeignKey, Index, String, BigInteger, func, select, union_all
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -26,18 +27,57 @@ class Translation(Base):
     language: Mapped["Language"] = relationship(back_populates="translations")
     user: Mapped["User"] = relationship(back_populates="translations")
 
+    __table_args__ = (
+        # Для случайной выборки по диапазону id внутри языка
+        Index("ix__translations__language_code_id", "language_code", "id"),
+    )
     __mapper_args__ = {"eager_defaults": True}
 
     def __repr__(self) -> str:
         return f"Translation: #{self.text}"
 
     @classmethod
-    async def get_random_translates(cls, language_code: str):
+    async def get_random_translates(cls, language_code: str, limit: int = 3, attempts: int = 3):
+        """
+        Random translations of the language without ``ORDER BY random()``.
+
+        Random ids are probed between the min and max id of the language,
+        every probe is one lookup in the (language_code, id) index, so the
+        cost does not grow with the table.
+        """
         with cls.db_session as session:
-            stmt = (select(cls)
-                    .where(cls.language_code == language_code)
-                    .order_by(func.random())
-                    .limit(3)
-                )
-            result = await session.execute(stmt)
-        return result.scalars().all()
\ No newline at end of file
+            stmt = (select(func.min(cls.id), func.max(cls.id))
+                    .where(cls.language_code == language_code))
+            min_id, max_id = (await session.execute(stmt)).one()
+            if min_id is None:
+                return []
+
+            # Маленький диапазон дешевле отсортировать целиком
+            if max_id - min_id < limit * 10:
+                stmt = (select(cls)
+                        .where(cls.language_code == language_code)
+                        .order_by(func.random())
+                        .limit(limit))
+                result = await session.execute(stmt)
+                return result.scalars().all()
+
+            found = {}
+            for _ in range(attempts):
+                probes = [select(cls.id)
+                          .where(cls.language_code == language_code,
+                                 cls.id >= random.randint(min_id, max_id))
+                          .order_by(cls.id)
+                          .limit(1)
+                          .subquery()
+                          .select()
+                          for _ in range(limit * 2)]
+                ids = (await session.execute(union_all(*probes))).scalars().all()
+                found.update(dict.fromkeys(ids))
+                if len(found) >= limit:
+                    break
+
+            ids = list(found)[:limit]
+            result = await session.execute(select(cls).where(cls.id.in_(ids)))
+            translations = list(result.scalars().all())
+        random.shuffle(translations)
+        return translations
@@ -1,9 +1,10 @@
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import BigInteger, ForeignKey, String, update
+from sqlalchemy import BigInteger, ForeignKey, String, select, update
 from sqlalchemy.orm import Mapped, mapped_column, relationship, synonym
 
 from .base import Base
+from ..user_cache import MISSING, UserProfile, user_cache
 
 if TYPE_CHECKING:
     from .chats import Chat
@@ -37,12 +38,51 @@ class User(Base):
 
     __mapper_args__ = {"eager_defaults": True}
 
+    @classmethod
+    async def get_profile(cls, user_id: int) -> Optional[UserProfile]:
+        """User profile through ``user_cache``, None if the user is not registered."""
+        profile = user_cache.get(user_id)
+        if profile is not MISSING:
+            return profile
+
+        with cls.db_session as session:
+            stmt = select(*(getattr(cls, field) for field in UserProfile._fields)).where(cls.id == user_id)
+            result = await session.execute(stmt)
+            row = result.first()
+
+        profile = UserProfile(*row) if row else None
+        user_cache.set(user_id, profile)
+        return profile
+
+    @classmethod
+    async def get_language_code(cls, user_id: int) -> Optional[str]:
+        profile = await cls.get_profile(user_id)
+        return profile.language_code if profile else None
+
+    @classmethod
+    async def add_new(cls, *args, **kwargs):
+        user = await super().add_new(*args, **kwargs)
+        user_cache.set(user.id, UserProfile(*(getattr(user, field) for field in UserProfile._fields)))
+        return user
+
+    @classmethod
+    async def upsert(cls, rows, *args, **kwargs):
+        await super().upsert(rows, *args, **kwargs)
+        for row in [rows] if isinstance(rows, dict) else rows:
+            user_cache.invalidate(row["id"])
+
+    @classmethod
+    async def update(cls, id: int, *args, **kwargs):
+        await super().update(id, *args, **kwargs)
+        user_cache.update(id, **kwargs)
+
     @classmethod
     async def update_user(cls, user_id: int, **kwargs):
         with cls.db_session as session:
             stmt = update(cls).where(cls.id == user_id).values(**kwargs)
             await session.execute(stmt)
             await session.commit()
+        user_cache.update(user_id, **kwargs)
 
     @classmethod
     async def update_user_language(cls, user_id: int, lang_code: str):
@@ -50,3 +90,4 @@ class User(Base):
             stmt = update(cls).where(cls.id == user_id).values(language_code=lang_code)
             await session.execute(stmt)
             await session.commit()
+        user_cache.update(user_id, language_code=lang_code)
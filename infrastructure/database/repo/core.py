@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
 from functools import wraps
-from typing import Sequence, Type, TypeVar
+from typing import AsyncIterator, Sequence, Type, TypeVar
 
-from sqlalchemy import MetaData, event, exc, inspect, update
+from sqlalchemy import MetaData, event, exc, func, insert, inspect, update
 from sqlalchemy import log as sqlalchemy_log
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import (AsyncAttrs, AsyncEngine, AsyncSession,
                                     async_sessionmaker)
 from sqlalchemy.orm import DeclarativeBase, context
@@ -36,6 +38,13 @@ convention = {
 }
 metadata = MetaData(naming_convention=convention)
 
+# Сессия открытого unit of work в текущей задаче
+_unit_of_work: ContextVar[AsyncSession | None] = ContextVar("unit_of_work", default=None)
+
+
+def in_unit_of_work(session: AsyncSession) -> bool:
+    return session.info.get("unit_of_work", False)
+
 
 def close_session(session: AsyncSession):
     loop = asyncio.get_event_loop()
@@ -91,7 +100,13 @@ def wrapper(session, cls_: Type[BaseCore]):
 
 class GetDbSession:
     def __get__(self, instance: T | None, cls: Type[T]):
-        session = getattr(instance, "_db_session", cls._session_maker())
+        session = getattr(instance, "_db_session", None)
+        if session is None:
+            session = _unit_of_work.get()
+            if session is not None:
+                # Сессией владеет unit of work, он ее и закроет
+                return nullcontext(session)
+            session = cls._session_maker()
 
         @contextmanager
         def get_context():
@@ -104,18 +119,17 @@ class GetDbSession:
 
 
 class SessionsManager:
-    sessions: dict[AsyncSession, list[int]]
+    sessions: dict[AsyncSession, set[int]]
 
     def __init__(self):
         self.sessions = {}
 
     def add_obj(self, obj: BaseCore):
-        if self.sessions.get(obj._db_session) is None:
-            self.sessions[obj._db_session] = []
-
-        self.sessions[obj._db_session].append(id(obj))
+        self.sessions.setdefault(obj._db_session, set()).add(id(obj))
 
     def close_session_if_list_is_empty(self, session: AsyncSession):
+        if in_unit_of_work(session):
+            return
         item = self.sessions.get(session)
         if not item:
             close_session(session)
@@ -126,7 +140,7 @@ class SessionsManager:
         if hasattr(obj, "_db_session"):
             lst = self.sessions.get(obj._db_session)
             if lst:
-                lst.remove(id(obj))
+                lst.discard(id(obj))
             self.close_session_if_list_is_empty(obj._db_session)
 
 
@@ -154,6 +168,39 @@ class BaseCore(AsyncAttrs, DeclarativeBase, metaclass=CombinedMeta):
 
     _db_session: AsyncSession
 
+    @classmethod
+    @asynccontextmanager
+    async def unit_of_work(cls) -> AsyncIterator[AsyncSession]:
+        """
+        Run repository calls in one session and one transaction.
+
+        Inside the block every ``db_session`` access returns the same session,
+        and ``commit`` calls of the repository methods only release savepoints.
+        The transaction is committed on exit and rolled back on error.
+        Nested blocks join the outer one.
+        """
+        session = _unit_of_work.get()
+        if session is not None:
+            yield session
+            return
+
+        async with cls._db_engine.connect() as connection:
+            transaction = await connection.begin()
+            session = cls._session_maker(bind=connection,
+                                         join_transaction_mode="create_savepoint")
+            session.info["unit_of_work"] = True
+            token = _unit_of_work.set(session)
+            try:
+                yield session
+                await session.commit()
+                await transaction.commit()
+            except BaseException:
+                await transaction.rollback()
+                raise
+            finally:
+                _unit_of_work.reset(token)
+                await session.close()
+
     @classmethod
     async def get(cls: Type[T], pk) -> T | None:
         """Geg object of the class from db by primary key"""
@@ -174,6 +221,47 @@ class BaseCore(AsyncAttrs, DeclarativeBase, metaclass=CombinedMeta):
             result = await db_session.execute(stmt)
             return result.scalars().all()
 
+    @classmethod
+    def _keyset_select(cls, columns: tuple, key, filters: dict):
+        key = key if key is not None else cls.__mapper__.primary_key[0]
+        stmt = select(*columns) if columns else select(cls)
+        return stmt.filter_by(**filters).order_by(key), key
+
+    @classmethod
+    async def stream(cls, *columns, yield_per: int = 1000, **filters) -> AsyncIterator:
+        """
+        Iterate over the table in primary key order with a server-side cursor.
+
+        Yields ORM objects, or rows when ``columns`` are given. Only
+        ``yield_per`` rows are kept in memory at a time.
+        """
+        stmt, _ = cls._keyset_select(columns, None, filters)
+        stmt = stmt.execution_options(yield_per=yield_per)
+        session = _unit_of_work.get()
+        async with nullcontext(session) if session else cls._session_maker() as session:
+            if columns:
+                result = await session.stream(stmt)
+            else:
+                result = await session.stream_scalars(stmt)
+            async for item in result:
+                yield item
+
+    @classmethod
+    async def paginate(cls, *columns, after_pk=None, limit: int = 1000, key=None, **filters) -> list:
+        """
+        One page of keyset pagination: the next ``limit`` items after ``after_pk``.
+
+        Items are ordered by ``key``, the primary key by default. ORM objects
+        are returned, or rows when ``columns`` are given.
+        """
+        stmt, key = cls._keyset_select(columns, key, filters)
+        stmt = stmt.limit(limit)
+        if after_pk is not None:
+            stmt = stmt.where(key > after_pk)
+        with cls.db_session as session:
+            result = await session.execute(stmt)
+            return list(result) if columns else list(result.scalars())
+
     @classmethod
     async def get_by_attributes(cls: Type[T], **kwargs) -> T:
         stmt = select(cls).filter_by(**kwargs)
@@ -197,6 +285,47 @@ class BaseCore(AsyncAttrs, DeclarativeBase, metaclass=CombinedMeta):
             await db_session.commit()
             return value
 
+    @classmethod
+    async def add_many(cls, rows: Sequence[dict], chunk_size: int = 5000) -> None:
+        """Insert rows with executemany in one transaction, without ORM objects."""
+        if not rows:
+            return
+        with cls.db_session as session:
+            for i in range(0, len(rows), chunk_size):
+                await session.execute(insert(cls), rows[i:i + chunk_size])
+            await session.commit()
+
+    @classmethod
+    async def upsert(cls,
+                     rows: dict | Sequence[dict],
+                     index_elements: Sequence[str] | None = None,
+                     update_fields: Sequence[str] | None = None) -> None:
+        """
+        INSERT ... ON CONFLICT for one or many rows.
+
+        Conflicts are detected on ``index_elements``, the primary key by
+        default. ``update_fields`` are overwritten from the new row, without
+        them conflicting rows are left as they are (DO NOTHING).
+        """
+        rows = [rows] if isinstance(rows, dict) else list(rows)
+        if not rows:
+            return
+        if index_elements is None:
+            index_elements = [column.name for column in cls.__mapper__.primary_key]
+
+        stmt = pg_insert(cls)
+        if update_fields:
+            set_ = {field: stmt.excluded[field] for field in update_fields}
+            if "update_date" in cls.__table__.c:
+                set_["update_date"] = func.now()
+            stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+        with cls.db_session as session:
+            await session.execute(stmt, rows)
+            await session.commit()
+
     @classmethod
     async def update(cls, id: int, *args, **kwargs):
         with cls.db_session as session:
@@ -246,7 +375,9 @@ def my_load_listener(target: BaseCore, context: context.QueryContext):
     async_session = state.async_session
     if async_session:
         target._db_session = async_session
-        target.__class__._sessions_manager.add_obj(target)
+        # Сессию unit of work закрывает он сам, объекты в ней не отслеживаем
+        if not in_unit_of_work(async_session):
+            target.__class__._sessions_manager.add_obj(target)
 
 
 event.listen(BaseCore, 'load', my_load_listener, propagate=True)
@@ -1,13 +1,21 @@
 import asyncio
 import logging
+from pathlib import Path
 
-from sqlalchemy import MetaData, NullPool
+from alembic.config import Config as AlembicConfig
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.asyncio import (AsyncEngine, async_sessionmaker,
                                     create_async_engine)
 
 from .models import Base
 from tgbot.config import DbConfig
 
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+# SQLSTATE PostgreSQL "undefined_table"
+UNDEFINED_TABLE = "42P01"
+
 
 async def create_db(db: DbConfig, echo: bool = False):
     engine = create_async_engine(
@@ -26,48 +34,44 @@ async def create_db(db: DbConfig, echo: bool = False):
     #     # await conn.run_sync(Base.metadata.drop_all)
     #     await conn.run_sync(Base.metadata.create_all)
 
-    # Блок, проверяющий бд на необходимость миграции (проверяет схему бд)
-    async with engine.begin() as conn:
-        current_metadata = MetaData()
-        await conn.run_sync(current_metadata.reflect)
-
-        # Получаем списки имен таблиц из каждого объекта MetaData.
-        current_metadata_table_names = list(current_metadata.tables.keys())
-
-        if len(current_metadata.tables) == 0:
-            logging.error("Database has no tables. Make init migration")
-            await asyncio.sleep(60)
-            raise SystemExit
-
-        try:
-            current_metadata_table_names.remove('alembic_version')
-        except (KeyError, ValueError):
-            logging.info("alembic_version table does not exist")
-
-        # Проходимся по каждой таблице и проверяем, что они содержат одинаковые
-        # названия колонок.
-        for table_name in current_metadata_table_names:
-            # Получаем объекты Table для текущих таблиц из каждого объекта
-            # MetaData.
-            table1 = current_metadata.tables[table_name]
-            table2 = Base.metadata.tables[table_name]
-
-            # Получаем списки имен колонок из каждого объекта Table.
-            table1_column_names = table1.columns.keys()
-            table2_column_names = table2.columns.keys()
-
-            # Сортируем списки имен колонок для упрощения сравнения.
-            table1_column_names_sorted = sorted(table1_column_names)
-            table2_column_names_sorted = sorted(table2_column_names)
-
-            # Сравниваем списки имен колонок, учитывая их порядок.
-            if table1_column_names_sorted != table2_column_names_sorted:
-                logging.error("Database schema is not up to date (Table "
-                              f"{table_name}). Make migrations")
-                await asyncio.sleep(120)
-                raise SystemExit
-
-        return engine
+    await check_migrations(engine)
+    return engine
+
+
+def get_code_heads() -> set[str]:
+    """Heads of the migrations shipped with the code."""
+    config = AlembicConfig()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+async def check_migrations(engine: AsyncEngine):
+    """
+    Compare the migration applied to the database with the code's head.
+
+    One query to ``alembic_version`` instead of reflecting the whole schema.
+    Only a missing table means no migrations, other database errors propagate.
+    """
+    code_heads = await asyncio.to_thread(get_code_heads)
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            db_heads = set(result.scalars())
+    except ProgrammingError as e:
+        # У обертки asyncpg код ошибки есть не во всех версиях SQLAlchemy, тогда берем его у исходной
+        sqlstate = (getattr(e.orig, "sqlstate", None)
+                    or getattr(e.orig.__cause__, "sqlstate", None))
+        if sqlstate != UNDEFINED_TABLE:
+            raise
+        db_heads = set()
+
+    if not db_heads:
+        logging.error("Database has no migrations applied. Make init migration")
+        raise SystemExit
+    if db_heads != code_heads:
+        logging.error(f"Database schema is not up to date ({', '.join(sorted(db_heads))} "
+                      f"!= {', '.join(sorted(code_heads))}). Make migrations")
+        raise SystemExit
 
 
 async def dispose_db(engine: AsyncEngine):
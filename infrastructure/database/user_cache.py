@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Union
+
+# Маркер того, что пользователя нет в кэше (None означает, что его нет в БД)
+MISSING = object()
+
+
+class UserProfile(NamedTuple):
+    id: int
+    username: Optional[str]
+    language_code: str
+    tg_username: Optional[str]
+    tg_first_name: Optional[str]
+    tg_last_name: Optional[str]
+
+
+class UserCache:
+    """
+    LRU cache of user profiles with TTL.
+
+    Unknown users are cached as ``None`` for ``negative_ttl``, so repeated
+    /start from unregistered users does not hit the database. Profiles are
+    plain tuples, so the cache does not hold DB sessions.
+    """
+
+    def __init__(self,
+                 maxsize: int = 10000,
+                 ttl: float = 300,
+                 negative_ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._items: OrderedDict[int, tuple[float, Optional[UserProfile]]] = OrderedDict()
+
+    def get(self, user_id: int) -> Union[UserProfile, None, object]:
+        """Cached profile, ``None`` for unknown users or ``MISSING``."""
+        item = self._items.get(user_id)
+        if item is None:
+            return MISSING
+        expires_at, profile = item
+        if expires_at < time.monotonic():
+            del self._items[user_id]
+            return MISSING
+        self._items.move_to_end(user_id)
+        return profile
+
+    def set(self, user_id: int, profile: Optional[UserProfile]) -> None:
+        ttl = self.ttl if profile is not None else self.negative_ttl
+        self._items[user_id] = (time.monotonic() + ttl, profile)
+        self._items.move_to_end(user_id)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def update(self, user_id: int, **values) -> None:
+        """Apply written values to a cached profile, drop it if they are unknown."""
+        item = self._items.get(user_id)
+        if item is None:
+            return
+        profile = item[1]
+        if profile is None or not values.keys() <= set(UserProfile._fields):
+            self.invalidate(user_id)
+            return
+        self._items[user_id] = (item[0], profile._replace(**values))
+
+    def invalidate(self, user_id: int) -> None:
+        self._items.pop(user_id, None)
+
+
+user_cache = UserCache()
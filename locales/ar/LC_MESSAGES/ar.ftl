@@ -22,4 +22,5 @@ wrong_answer = إجابة خاطئة
 correct_answer = إجابة صحيحة
 all_instruction = 🟢  هذا روبوت يمكنه التحدث باللغة الشيشانية 💬\nلا يزال يتعلم، لذلك قد يرتكب الكثير من الأخطاء.\n\n👥  للتحدث فقط، انتقل إلى قسم "تابشولت".\n\n🔄  للترجمة من لغة إلى أخرى، انتقل إلى قسم "الترجمة".\n\n\n❔  للحصول على ملاحظات، اتصل بالمسؤول: @turpal_shams
 to_go_repair = بسبب الأعمال التقنية، سيتم إيقاف تشغيل الروبوت. سنعلمك عند استئناف التشغيل.
-back_from_repair = الروبوت عاد إلى الخدمة. لبدء الاستخدام، اضغط على  /start
\ No newline at end of file
+back_from_repair = الروبوت عاد إلى الخدمة. لبدء الاستخدام، اضغط على  /start
+llm_busy = هناك طلبات كثيرة الآن، يرجى المحاولة مرة أخرى بعد قليل.
\ No newline at end of file
@@ -22,4 +22,5 @@ wrong_answer = Харц жоп
 correct_answer = Нийса жоп
 all_instruction = 🟢  ХӀара нохчийн мотт бийца хууш бот ю 💬\nИза хӀинцца нохчийн мотт Ӏамош ю, цундела дуккха а гӀалаташ даха тарло цуьнан.\n\n👥  Цуьнца къамел дан "Тапчсолт" декъе гӀо.\n\n🔄  Дешнаш гочдан "Гочдар" декъе гӀо.\n\n\n❔  Хаттарш а, хьехарш а администраторе язде: @turpal_shams
 to_go_repair = Технически белхаш бахьанехь Тапчсолта жоп луш хир вац. Иза кхин дӀа а болх беш хилча, оха яздийр ду шуьга.
-back_from_repair = Тапчсолт кхузахь ву хӀинца. Юха дӀадоло, тӀетаӀъе  /start
\ No newline at end of file
+back_from_repair = Тапчсолт кхузахь ву хӀинца. Юха дӀадоло, тӀетаӀъе  /start
+llm_busy = ХӀинца дехарш дукха ду, жимма хан яьлча юха а хьажа.
\ No newline at end of file
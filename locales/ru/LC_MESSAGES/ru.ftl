@@ -22,4 +22,5 @@ wrong_answer = Неправильный ответ
 correct_answer = Правильный ответ
 all_instruction = 🟢  Это бот, который умеет говорить на чеченском языке 💬\nОн только учится, поэтому может допускать много ошибок.\n\n👥  Чтобы просто поговорить перейдите в раздел "Тапчсолт".\n\n🔄  Чтобы сделать перевод содного языка на другой, перейдите в раздел "Перевод".\n\n\n❔  Для обратной связи пишите администратору: @turpal_shams
 to_go_repair = Из-за технических работ Тапчсолт будет отключен. Мы напишем вам, когда он продолжит работу.
-back_from_repair = Тапчсолт снова в строю. Чтобы начать пользоваться, нажмите  /start
\ No newline at end of file
+back_from_repair = Тапчсолт снова в строю. Чтобы начать пользоваться, нажмите  /start
+llm_busy = Сейчас слишком много запросов, попробуйте ещё раз чуть позже.
\ No newline at end of file
@@ -22,4 +22,5 @@ wrong_answer = Неправильна відповідь
 correct_answer = Правильна відповідь
 all_instruction = 🟢  Це бот, який вміє говорити чеченською мовою 💬\nВін ще вчиться, тому може робити багато помилок.\n\n👥  Щоб просто поспілкуватися, перейдіть до розділу "Тапчсолт".\n\n🔄  Щоб перекласти з однієї мови на іншу, перейдіть до розділу "Переклад".\n\n\n❔  Для зворотного зв'язку звертайтеся до адміністратора: @turpal_shams
 to_go_repair = Через технічні роботи бот буде відключено. Ми повідомимо вас, коли він продовжить роботу.
-back_from_repair = Бот знову в строю. Щоб почати користуватися, натисніть  /start
\ No newline at end of file
+back_from_repair = Бот знову в строю. Щоб почати користуватися, натисніть  /start
+llm_busy = Зараз забагато запитів, спробуйте ще раз трохи пізніше.
\ No newline at end of file
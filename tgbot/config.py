@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Literal, Optional
 
 from environs import Env
@@ -79,7 +79,40 @@ class TgBot:
     admin_ids: list[int]
     use_redis: bool
     gemini_api_key: str
-    proxy_url: Optional[str] = None
+    proxy_urls: list[str] = field(default_factory=list)
+    edit_interval_ms: int = 1000
+    translation_cache_size: int = 10000
+    translation_cache_ttl: int = 86400
+    history_max_tokens: int = 3000
+    history_max_turns: int = 100
+    llm_max_concurrency: int = 8
+    llm_max_queue: int = 100
+    openai_api_key: Optional[str] = None
+    openai_model: str = "gpt-3.5-turbo"
+    ai_providers: list[str] = field(default_factory=lambda: ["google", "openai"])
+    ai_hedge: bool = False
+    ai_hedge_min_delay: float = 3.0
+    ai_breaker_threshold: int = 5
+    ai_breaker_cooldown: float = 30.0
+    ai_max_attempts: int = 3
+    ai_retry_budget_ratio: float = 0.2
+    proxy_health_ttl: float = 60.0
+    metrics_host: str = "127.0.0.1"
+    metrics_port: Optional[int] = None
+    broadcast_rate: float = 25.0
+    broadcast_concurrency: int = 8
+    locale_cache_size: int = 10000
+    user_cache_ttl: float = 300.0
+    replica_cache_ttl: float = 10.0
+    chat_order_lease: float = 30.0
+    update_max_concurrency: int = 100
+    webhook_url: Optional[str] = None
+    webhook_path: str = "/webhook"
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    webhook_secret: Optional[str] = None
+    webhook_max_in_flight: int = 100
+    api_server: Optional[str] = None
 
     @staticmethod
     def from_env(env: Env):
@@ -91,13 +124,103 @@ class TgBot:
         admin_ids = env.list("ADMINS", subcast=int)
         use_redis = env.bool("USE_REDIS")
         gemini_api_key = env.str("GEMINI_API_KEY")
-        proxy_url = env.str("PROXY_URL", None)  # Необязательный параметр
+        # Необязательный пул прокси для Gemini, PROXY_URL оставлен для одного прокси
+        proxy_urls = env.list("PROXY_URLS", [])
+        proxy_url = env.str("PROXY_URL", None)
+        if proxy_url and proxy_url not in proxy_urls:
+            proxy_urls.append(proxy_url)
+        # Минимальный интервал между редактированиями сообщений в одном чате
+        edit_interval_ms = env.int("EDIT_INTERVAL_MS", 1000)
+        translation_cache_size = env.int("TRANSLATION_CACHE_SIZE", 10000)
+        translation_cache_ttl = env.int("TRANSLATION_CACHE_TTL", 86400)
+        # Бюджет токенов истории диалога, сверх него старые реплики сворачиваются в резюме
+        history_max_tokens = env.int("HISTORY_MAX_TOKENS", 3000)
+        history_max_turns = env.int("HISTORY_MAX_TURNS", 100)
+        # Общий лимит одновременных запросов к ИИ и размер очереди ожидания
+        llm_max_concurrency = env.int("LLM_MAX_CONCURRENCY", 8)
+        llm_max_queue = env.int("LLM_MAX_QUEUE", 100)
+        # Провайдеры ИИ в порядке предпочтения и хеджирование медленных запросов
+        openai_api_key = env.str("OPENAI_API_KEY", None)
+        openai_model = env.str("OPENAI_MODEL", "gpt-3.5-turbo")
+        ai_providers = env.list("AI_PROVIDERS", ["google", "openai"])
+        ai_hedge = env.bool("AI_HEDGE", False)
+        ai_hedge_min_delay = env.float("AI_HEDGE_MIN_DELAY", 3.0)
+        # Circuit breaker: после N ошибок подряд провайдер отключается на время остывания
+        ai_breaker_threshold = env.int("AI_BREAKER_THRESHOLD", 5)
+        ai_breaker_cooldown = env.float("AI_BREAKER_COOLDOWN", 30.0)
+        # Повторы запросов ограничены долей от общего трафика
+        ai_max_attempts = env.int("AI_MAX_ATTEMPTS", 3)
+        ai_retry_budget_ratio = env.float("AI_RETRY_BUDGET_RATIO", 0.2)
+        # Как часто фоном проверять прокси
+        proxy_health_ttl = env.float("PROXY_HEALTH_TTL", 60.0)
+        # Метрики запросов к ИИ в формате Prometheus, без порта сервер не запускается
+        metrics_host = env.str("METRICS_HOST", "127.0.0.1")
+        metrics_port = env.int("METRICS_PORT", None)
+        # Рассылки: общий лимит сообщений в секунду и число параллельных отправителей
+        broadcast_rate = env.float("BROADCAST_RATE", 25.0)
+        broadcast_concurrency = env.int("BROADCAST_CONCURRENCY", 8)
+        # Сколько языков пользователей держать в памяти
+        locale_cache_size = env.int("LOCALE_CACHE_SIZE", 10000)
+        # Сколько секунд профиль пользователя живет в кэше
+        user_cache_ttl = env.float("USER_CACHE_TTL", 300.0)
+        # С USE_REDIS можно запускать несколько реплик: локальные кэши живут недолго,
+        # а обновления одного чата обрабатываются по очереди на любой реплике
+        replica_cache_ttl = env.float("REPLICA_CACHE_TTL", 10.0)
+        chat_order_lease = env.float("CHAT_ORDER_LEASE", 30.0)
+        # Обновления одного чата идут по очереди, разные чаты - параллельно, но не больше N сразу
+        update_max_concurrency = env.int("UPDATE_MAX_CONCURRENCY", 100)
+        # С WEBHOOK_URL бот принимает обновления через вебхук, без него - polling
+        webhook_url = env.str("WEBHOOK_URL", None)
+        webhook_path = env.str("WEBHOOK_PATH", "/webhook")
+        webhook_host = env.str("WEBHOOK_HOST", "0.0.0.0")
+        webhook_port = env.int("WEBHOOK_PORT", 8080)
+        # Без секрета любой, кто достучится до порта, сможет прислать поддельное обновление
+        webhook_secret = env.str("WEBHOOK_SECRET", None)
+        if webhook_url and not webhook_secret:
+            raise ValueError("WEBHOOK_SECRET is required when WEBHOOK_URL is set")
+        # Сколько обновлений вебхука обрабатывается одновременно
+        webhook_max_in_flight = env.int("WEBHOOK_MAX_IN_FLIGHT", 100)
+        # Свой сервер Bot API, например локальный для нагрузочных тестов
+        api_server = env.str("TELEGRAM_API_SERVER", None)
         return TgBot(token=token,
                      bot_name=bot_name,
                      admin_ids=admin_ids,
                      use_redis=use_redis,
                      gemini_api_key=gemini_api_key,
-                     proxy_url=proxy_url)
+                     proxy_urls=proxy_urls,
+                     edit_interval_ms=edit_interval_ms,
+                     translation_cache_size=translation_cache_size,
+                     translation_cache_ttl=translation_cache_ttl,
+                     history_max_tokens=history_max_tokens,
+                     history_max_turns=history_max_turns,
+                     llm_max_concurrency=llm_max_concurrency,
+                     llm_max_queue=llm_max_queue,
+                     openai_api_key=openai_api_key,
+                     openai_model=openai_model,
+                     ai_providers=ai_providers,
+                     ai_hedge=ai_hedge,
+                     ai_hedge_min_delay=ai_hedge_min_delay,
+                     ai_breaker_threshold=ai_breaker_threshold,
+                     ai_breaker_cooldown=ai_breaker_cooldown,
+                     ai_max_attempts=ai_max_attempts,
+                     ai_retry_budget_ratio=ai_retry_budget_ratio,
+                     proxy_health_ttl=proxy_health_ttl,
+                     metrics_host=metrics_host,
+                     metrics_port=metrics_port,
+                     broadcast_rate=broadcast_rate,
+                     broadcast_concurrency=broadcast_concurrency,
+                     locale_cache_size=locale_cache_size,
+                     user_cache_ttl=user_cache_ttl,
+                     replica_cache_ttl=replica_cache_ttl,
+                     chat_order_lease=chat_order_lease,
+                     update_max_concurrency=update_max_concurrency,
+                     webhook_url=webhook_url,
+                     webhook_path=webhook_path,
+                     webhook_host=webhook_host,
+                     webhook_port=webhook_port,
+                     webhook_secret=webhook_secret,
+                     webhook_max_in_flight=webhook_max_in_flight,
+                     api_server=api_server)
 
 
 @dataclass
@@ -133,7 +256,7 @@ class RedisConfig:
         """
         Creates the RedisConfig object from environment variables.
         """
-        redis_pass = env.str("REDIS_PASSWORD")
+        redis_pass = env.str("REDIS_PASSWORD", None)
         redis_port = env.int("REDIS_PORT")
         redis_host = env.str("REDIS_HOST")
 
@@ -213,10 +336,12 @@ def load_config(path: str | None = None) -> Config:
     env = Env()
     env.read_env(path)
 
+    tg_bot = TgBot.from_env(env)
+
     return Config(
-        tg_bot=TgBot.from_env(env),
+        tg_bot=tg_bot,
         db=DbConfig.from_env(env),
         misc=Miscellaneous.from_env(env),
         environment=env.str("ENVIRONMENT", "dev"),
-        # redis=RedisConfig.from_env(env),
+        redis=RedisConfig.from_env(env) if tg_bot.use_redis else None,
     )
@@ -1,20 +1,26 @@
 import asyncio
-from typing import Any, Awaitable, Callable, Dict, Union
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
 
-from aiogram import BaseMiddleware, types
+from aiogram import BaseMiddleware, Bot, types
+from redis.asyncio import Redis
 
 
 class AlbumMiddleware(BaseMiddleware):
     """This middleware is for capturing media groups."""
 
-    album_data: dict = {}
-
-    def __init__(self, latency: Union[int, float] = 0.1):
+    def __init__(self,
+                 latency: Union[int, float] = 0.1,
+                 redis: Optional[Redis] = None,
+                 prefix: str = "album"):
         """
         You can provide custom latency to make sure
         albums are handled properly in highload.
+        With ``redis`` the parts are collected across all bot replicas.
         """
         self.latency = latency
+        self.redis = redis
+        self.prefix = prefix
+        self.album_data: dict[str, list[types.Message]] = {}
 
     async def __call__(
             self,
@@ -25,16 +31,42 @@ class AlbumMiddleware(BaseMiddleware):
         if not event.media_group_id:
             return await handler(event, data)
 
+        if self.redis is not None:
+            album = await self._collect_shared(event, data["bot"])
+        else:
+            album = await self._collect_local(event)
+
+        if album is None:
+            return
+        data["album"] = album
+        return await handler(event, data)
+
+    async def _collect_local(self, event: types.Message) -> Optional[list[types.Message]]:
         try:
             self.album_data[event.media_group_id].append(event)
         except KeyError:
             self.album_data[event.media_group_id] = [event]
 
         await asyncio.sleep(self.latency)
-        try:
-            data["album"] = self.album_data.pop(event.media_group_id)
-            # del self.album_data[event.media_group_id]
-        except KeyError:
-            return
-        else:
-            return await handler(event, data)
+        return self.album_data.pop(event.media_group_id, None)
+
+    async def _collect_shared(self, event: types.Message, bot: Bot) -> Optional[list[types.Message]]:
+        # Части альбома могут прийти на разные реплики, альбом отдает та,
+        # чья часть была добавлена последней
+        key = f"{self.prefix}:{event.media_group_id}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, event.model_dump_json(exclude_none=True))
+            pipe.expire(key, 60)
+            position, _ = await pipe.execute()
+
+        await asyncio.sleep(self.latency)
+        if await self.redis.llen(key) != position:
+            return None
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(key, 0, -1)
+            pipe.delete(key)
+            parts, _ = await pipe.execute()
+
+        album = [types.Message.model_validate_json(part).as_(bot) for part in parts]
+        return sorted(album, key=lambda message: message.message_id)
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Chat, Update
+from redis.asyncio import Redis
+
+from tgbot.services.redis_lease import RELEASE_LOCK, RENEW_LOCK
+
+logger = logging.getLogger(__name__)
+
+
+class ChatOrderMiddleware(BaseMiddleware):
+    """
+    Handles updates of one chat one at a time and in update_id order,
+    on whichever replica they arrive.
+
+    Every update is registered in a Redis sorted set of its chat and waits
+    until it is the oldest one there and the chat lock is free. Both the
+    entry and the lock are leases renewed while the update is handled, so a
+    crashed replica blocks the chat for at most ``lease`` seconds.
+    Different chats are not blocked by each other. Waiters poll Redis with
+    backoff and are woken at once when the chat is released on this replica.
+    """
+
+    def __init__(self,
+                 redis: Redis,
+                 lease: float = 30.0,
+                 poll_interval: float = 0.01,
+                 max_poll_interval: float = 0.2,
+                 prefix: str = "chat_order"):
+        self.redis = redis
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.prefix = prefix
+        self._released: dict[str, asyncio.Event] = {}
+        self._release_lock = redis.register_script(RELEASE_LOCK)
+        self._renew_lock = redis.register_script(RENEW_LOCK)
+
+    async def __call__(
+            self,
+            handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+            event: Update,
+            data: Dict[str, Any]
+    ) -> Any:
+        chat: Chat | None = data.get("event_chat")
+        # Части альбома собирает AlbumMiddleware, им нельзя ждать друг друга
+        if chat is None or (event.message and event.message.media_group_id):
+            return await handler(event, data)
+
+        queue_key = f"{self.prefix}:{data['bot'].id}:{chat.id}"
+        lease_key = f"{queue_key}:lease"
+        lock_key = f"{queue_key}:lock"
+        member = str(event.update_id)
+
+        await self._register(queue_key, lease_key, member, event.update_id)
+        renewer = asyncio.create_task(self._keep_lease(queue_key, lease_key, lock_key, member))
+        try:
+            await self._wait_turn(queue_key, lease_key, lock_key, member)
+            return await handler(event, data)
+        finally:
+            renewer.cancel()
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.zrem(queue_key, member)
+                pipe.hdel(lease_key, member)
+                await pipe.execute()
+            await self._release_lock(keys=[lock_key], args=[member])
+            released = self._released.pop(queue_key, None)
+            if released is not None:
+                released.set()
+
+    @staticmethod
+    def _str(value: Any) -> Any:
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def _register(self, queue_key: str, lease_key: str, member: str, update_id: int) -> None:
+        # Одним запросом: пока обновление не в очереди, более позднее может его обогнать
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(lease_key, member, time.time() + self.lease)
+            pipe.zadd(queue_key, {member: update_id})
+            pipe.expire(lease_key, int(self.lease * 10))
+            pipe.expire(queue_key, int(self.lease * 10))
+            await pipe.execute()
+
+    async def _renew(self, queue_key: str, lease_key: str, lock_key: str, member: str) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(lease_key, member, time.time() + self.lease)
+            pipe.expire(lease_key, int(self.lease * 10))
+            pipe.expire(queue_key, int(self.lease * 10))
+            await pipe.execute()
+        await self._renew_lock(keys=[lock_key], args=[member, int(self.lease * 1000)])
+
+    async def _keep_lease(self, queue_key: str, lease_key: str, lock_key: str, member: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            await self._renew(queue_key, lease_key, lock_key, member)
+
+    async def _wait_turn(self, queue_key: str, lease_key: str, lock_key: str, member: str) -> None:
+        delay = self.poll_interval
+        previous_head = None
+        while True:
+            members = await self.redis.zrange(queue_key, 0, 0)
+            head = self._str(members[0]) if members else member
+            if head != previous_head:
+                # Очередь продвинулась, снова опрашиваем часто
+                previous_head = head
+                delay = self.poll_interval
+
+            if head != member:
+                deadline = await self.redis.hget(lease_key, head)
+                if deadline is None or float(deadline) < time.time():
+                    # Без аренды обновление либо уже обработано, либо его реплика упала
+                    if deadline is not None:
+                        logger.warning(f"Lease of update {head} in {queue_key} expired")
+                    async with self.redis.pipeline(transaction=True) as pipe:
+                        pipe.zrem(queue_key, head)
+                        pipe.hdel(lease_key, head)
+                        await pipe.execute()
+                    continue
+            # Обновление, пришедшее с опозданием, не должно обогнать уже начатое
+            elif await self.redis.set(lock_key, member, nx=True, px=int(self.lease * 1000)):
+                return
+
+            released = self._released.setdefault(queue_key, asyncio.Event())
+            try:
+                await asyncio.wait_for(released.wait(), delay)
+            except asyncio.TimeoutError:
+                delay = min(delay * 2, self.max_poll_interval)
@@ -0,0 +1,133 @@
+import asyncio
+import bisect
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Chat, Update
+
+DEPTH_BUCKETS = (1, 2, 3, 5, 10, 20, 50)
+WAIT_BUCKETS = (0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+class _ChatQueue:
+    __slots__ = ("lock", "depth")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0
+
+
+class ChatSerialMiddleware(BaseMiddleware):
+    """
+    Per-chat serial executor for updates.
+
+    Updates of one chat are handled one after another in arrival order,
+    so a slow AI answer cannot interleave with the next message of the same
+    conversation. Different chats run concurrently, at most
+    ``max_concurrency`` handlers at a time. ``render`` exports queue depth
+    and waiting time in the Prometheus text format.
+
+    The place in the chat queue is taken before the first await, so the
+    middleware has to run before any middleware that awaits - use ``setup``.
+    """
+
+    def __init__(self, max_concurrency: int = 100):
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._chats: dict[int, _ChatQueue] = {}
+
+        self.running = 0
+        self.waiting = 0
+        self.max_depth = 0
+        self._depth_buckets = [0] * (len(DEPTH_BUCKETS) + 1)
+        self._depth_sum = 0.0
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self._wait_sum = 0.0
+
+    def setup(self, dispatcher: Dispatcher) -> None:
+        """Put the middleware first in the outer chain of updates."""
+        outer = dispatcher.update.outer_middleware
+        registered = list(outer)
+        for middleware in registered:
+            outer.unregister(middleware)
+        outer.register(self)
+        for middleware in registered:
+            outer.register(middleware)
+
+    async def __call__(
+            self,
+            handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+            event: Update,
+            data: Dict[str, Any]
+    ) -> Any:
+        # Работаем раньше UserContextMiddleware, поэтому чат определяем сами
+        chat: Chat | None = UserContextMiddleware.resolve_event_context(event).chat
+        queue = None
+        # Части альбома ждут друг друга в AlbumMiddleware, их не выстраиваем в очередь
+        if chat is not None and not (event.message and event.message.media_group_id):
+            queue = self._chats.get(chat.id)
+            if queue is None:
+                queue = self._chats[chat.id] = _ChatQueue()
+            queue.depth += 1
+            self.max_depth = max(self.max_depth, queue.depth)
+            self._depth_buckets[bisect.bisect_left(DEPTH_BUCKETS, queue.depth)] += 1
+            self._depth_sum += queue.depth
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        waiting = True
+        try:
+            async with queue.lock if queue else nullcontext():
+                async with self._slots:
+                    self.waiting -= 1
+                    waiting = False
+                    wait = time.monotonic() - queued_at
+                    self._wait_buckets[bisect.bisect_left(WAIT_BUCKETS, wait)] += 1
+                    self._wait_sum += wait
+
+                    self.running += 1
+                    try:
+                        return await handler(event, data)
+                    finally:
+                        self.running -= 1
+        finally:
+            if waiting:
+                self.waiting -= 1
+            if queue is not None:
+                queue.depth -= 1
+                if queue.depth == 0:
+                    del self._chats[chat.id]
+
+    def render(self) -> str:
+        lines = [
+            "# HELP updates_running Updates being handled now.",
+            "# TYPE updates_running gauge",
+            f"updates_running {self.running}",
+            "# HELP updates_waiting Updates waiting for their chat or for a free slot.",
+            "# TYPE updates_waiting gauge",
+            f"updates_waiting {self.waiting}",
+            "# HELP chats_queued Chats with updates in progress or waiting.",
+            "# TYPE chats_queued gauge",
+            f"chats_queued {len(self._chats)}",
+            "# HELP chat_queue_depth_max Largest queue of one chat since start.",
+            "# TYPE chat_queue_depth_max gauge",
+            f"chat_queue_depth_max {self.max_depth}",
+        ]
+
+        for name, bounds, buckets, total, help_text in (
+                ("chat_queue_depth", DEPTH_BUCKETS, self._depth_buckets,
+                 self._depth_sum, "Queue depth of the chat when an update arrives."),
+                ("update_wait_seconds", WAIT_BUCKETS, self._wait_buckets,
+                 self._wait_sum, "Time from arrival to the start of handling.")):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            cumulative = 0
+            for bound, count in zip((*bounds, "+Inf"), buckets):
+                cumulative += count
+                lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum {total:.6f}")
+            lines.append(f"{name}_count {cumulative}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,30 @@
+import logging
+import time
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+logger = logging.getLogger(__name__)
+
+
+class ColdStartMiddleware(BaseMiddleware):
+    """Logs the time from process start to the first handled update."""
+
+    def __init__(self, started_at: float) -> None:
+        self.started_at = started_at
+        self.reported = False
+
+    async def __call__(
+            self,
+            handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+            event: Update,
+            data: Dict[str, Any]
+    ) -> Any:
+        try:
+            return await handler(event, data)
+        finally:
+            if not self.reported:
+                self.reported = True
+                logger.info(f"Cold start: first update handled in "
+                            f"{time.monotonic() - self.started_at:.2f} s")
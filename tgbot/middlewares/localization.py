@@ -1,35 +1,52 @@
-from typing import Callable, Dict, Any, Awaitable, Tuple
+from typing import Callable, Dict, Any, Awaitable, Optional
 
 from aiogram_i18n import I18nMiddleware
+from aiogram_i18n.cores import BaseCore
+from aiogram_i18n.managers import BaseManager
 from aiogram import BaseMiddleware
 from aiogram import types
 
+from tgbot.services.locale_cache import LocaleCache
 
-LANG_STORAGE = {}
 
+class UserLocaleManager(BaseManager):
+    """
+    Locale of the user who sent the update, read through LocaleCache.
 
-class LocalizationMiddleware(I18nMiddleware):
-    async def get_locale(self, event: types.TelegramObject, data: Dict[str, Any]) -> str:
-        """
-        Detect current user locale based on event and context.
+    ``event_from_user`` is the real sender for every update type, callback
+    queries included.
+    """
+
+    def __init__(self,
+                 locale_cache: LocaleCache,
+                 core: BaseCore,
+                 default_locale: Optional[str] = None):
+        super().__init__(default_locale=default_locale)
+        self.locale_cache = locale_cache
+        self.core = core
 
-        **This method must be defined in child classes**
+    def _fallback(self, user: types.User) -> str:
+        # Пока пользователь не выбрал язык, берем язык его Telegram клиента
+        if user.language_code in self.core.available_locales:
+            return user.language_code
+        return self.default_locale
 
-        :param event:
-        :param data:
-        :return:
-        """
+    async def get_locale(self, event_from_user: Optional[types.User] = None) -> str:
+        if event_from_user is None:
+            return self.default_locale
+        return await self.locale_cache.get(event_from_user.id,
+                                           fallback=self._fallback(event_from_user))
 
-        if isinstance(event, types.Message):
-            user_id = event.from_user.id
-        elif isinstance(event, types.CallbackQuery):
-            user_id = event.message.from_user.id
+    async def set_locale(self, locale: str, event_from_user: Optional[types.User] = None) -> None:
+        if event_from_user is not None:
+            await self.locale_cache.set(event_from_user.id, locale)
 
-        if LANG_STORAGE.get(user_id) is None:
-            LANG_STORAGE[user_id] = "en"
 
-        language = data['locale'] = LANG_STORAGE[user_id]
-        return language
+class LocalizationMiddleware(I18nMiddleware):
+    def __init__(self, core: BaseCore, locale_cache: LocaleCache, **kwargs):
+        super().__init__(core=core,
+                         manager=UserLocaleManager(locale_cache, core),
+                         **kwargs)
 
 
 class LocalMiddleware(BaseMiddleware):
@@ -43,4 +60,4 @@ class LocalMiddleware(BaseMiddleware):
             data: Dict[str, Any]
     ) -> Any:
         data['_'] = self._
-        return await handler(event, data)
\ No newline at end of file
+        return await handler(event, data)
@@ -0,0 +1,20 @@
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message
+
+
+class ServicesMiddleware(BaseMiddleware):
+    """Injects process-wide services (AI clients, caches, etc.) into handler data."""
+
+    def __init__(self, **services: Any) -> None:
+        self.services = services
+
+    async def __call__(
+            self,
+            handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+            event: Message,
+            data: Dict[str, Any]
+    ) -> Any:
+        data.update(self.services)
+        return await handler(event, data)
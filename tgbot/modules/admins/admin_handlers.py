@@ -1,9 +1,12 @@
+import asyncio
 import json
 import logging
 import re
+import time
 
-from aiogram import F, Router, Bot
+from aiogram import F, Router
 from aiogram.filters import Command, CommandStart, CommandObject
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
 from aiogram.types import Message, ContentType, FSInputFile, URLInputFile
 from aiogram.fsm.context import FSMContext
 from aiogram_dialog import DialogManager
@@ -11,11 +14,16 @@ from aiogram_i18n import I18nContext
 
 from tgbot.config import Config
 from tgbot.filters.admin import AdminFilter
-from infrastructure.database.models import (Language, User)
+from infrastructure.database.language_catalog import LanguageCatalog
+from infrastructure.database.models import Broadcast, Language
+from tgbot.services.broadcaster import BroadcastEngine
 # from tgbot.keyboards.admin import get_keyboard
 
 logger = logging.getLogger(__name__)
 
+# Как часто обновлять админу сообщение с прогрессом рассылки, в секундах
+PROGRESS_UPDATE_INTERVAL = 5
+
 admin_handlers_router = Router()
 admin_handlers_router.message.filter(AdminFilter())
 admin_handlers_router.message.filter(F.chat.type == "private")
@@ -23,7 +31,9 @@ admin_handlers_router.callback_query.filter(F.message.chat.type == "private")
 
 
 @admin_handlers_router.message(Command(commands=["add_languages"]))
-async def add_main_languages(message: Message, config: Config) -> None:
+async def add_main_languages(message: Message,
+                             config: Config,
+                             language_catalog: LanguageCatalog) -> None:
     languages = {
         'ce': '🏴  Нохчийн',
         'en': '🇺🇲  English',
@@ -35,8 +45,10 @@ async def add_main_languages(message: Message, config: Config) -> None:
         'fr': '🇫🇷  Le français',
     }
 
-    for code, title in languages.items():
-        await Language.add_new(code=code, title=title)
+    await Language.upsert([{"code": code, "title": title} for code, title in languages.items()],
+                          index_elements=["code"],
+                          update_fields=["title"])
+    await language_catalog.invalidate()
     text = "Языки добавлены в базу данных!"
     await message.answer(text)
 
@@ -55,48 +67,98 @@ async def get_help(message: Message,
 """)
 
 
+async def notify_all_users(status_message: Message,
+                           i18n: I18nContext,
+                           broadcast_engine: BroadcastEngine,
+                           key: str,
+                           title: str) -> None:
+    """
+    Фоновая рассылка всем пользователям на их языке с прогрессом для админа
+    """
+    # Текст рендерится один раз на язык, а не на каждого пользователя
+    broadcasts = await broadcast_engine.create_localized(
+        lambda locale: i18n.get(key, locale),
+        exclude={status_message.chat.id})
+    total = sum(broadcast.total for broadcast in broadcasts)
+    logger.info(f"{title}: {total} users, {len(broadcasts)} languages")
+    interrupted = 0
+    # До какого времени Telegram просил не редактировать сообщение
+    paused_until = 0.0
+
+    async def report(done: bool = False):
+        nonlocal paused_until
+        sent = sum(broadcast.sent for broadcast in broadcasts)
+        failed = sum(broadcast.failed for broadcast in broadcasts)
+        text = (f"{title}\n"
+                f"Отправлено: {sent}/{total}, ошибок: {failed}")
+        if done and interrupted:
+            text += ("\n\nРассылка прервалась, она продолжится автоматически"
+                     if broadcast_engine.redis is not None
+                     else "\n\nРассылка прервалась, она продолжится после перезапуска бота")
+        elif done:
+            text += "\n\nСообщения отправлены!"
+
+        # Промежуточный прогресс можно пропустить, итоговый отчет - нет
+        for _ in range(3 if done else 1):
+            pause = paused_until - time.monotonic()
+            if pause > 0:
+                if not done:
+                    return
+                await asyncio.sleep(pause)
+            try:
+                await status_message.edit_text(text)
+            except TelegramRetryAfter as e:
+                logger.warning(f"{title}: progress edit flood limit, retry after {e.retry_after} s")
+                paused_until = time.monotonic() + e.retry_after
+                continue
+            except TelegramBadRequest as e:
+                if "message is not modified" not in str(e):
+                    logger.warning(f"{title}: progress edit failed: {e}")
+            except TelegramAPIError:
+                logger.exception(f"{title}: progress edit failed")
+            return
+
+    tasks = {broadcast_engine.start(broadcast): broadcast for broadcast in broadcasts}
+    pending = set(tasks)
+    while pending:
+        _, pending = await asyncio.wait(pending, timeout=PROGRESS_UPDATE_INTERVAL)
+        if pending:
+            await report()
+
+    interrupted = sum(task.cancelled() or task.exception() is not None for task in tasks)
+    # run() сразу возвращает рассылку, которую отправляет другая реплика:
+    # ждем, пока та не отметит ее в БД законченной
+    elsewhere = [broadcast for task, broadcast in tasks.items()
+                 if not task.cancelled() and task.exception() is None
+                 and broadcast.status != Broadcast.DONE]
+    while elsewhere:
+        await report()
+        await asyncio.sleep(PROGRESS_UPDATE_INTERVAL)
+        for broadcast in elsewhere:
+            stored = await Broadcast.get(broadcast.id)
+            broadcast.sent, broadcast.failed, broadcast.status = stored.sent, stored.failed, stored.status
+        elsewhere = [broadcast for broadcast in elsewhere if broadcast.status != Broadcast.DONE]
+    await report(done=True)
+
+
 @admin_handlers_router.message(Command(commands=["to_rapair"]))
 async def to_repair(message: Message,
-                    config: Config,
-                    bot: Bot,
                     i18n: I18nContext,
-                    dialog_manager: DialogManager) -> None:
-    await message.answer("Отправка сообщения всем пользователям о том, что мы идем на ремонты")
-
-    users = await User.get_all()
-    logging.info(len(users))
-    for user in users:
-        if user.id != message.chat.id:
-            await i18n.set_locale(user.language_code)
-            _ = i18n.get
-            try:
-                await bot.send_message(chat_id=user.id, text=_("to_go_repair"))
-            except Exception as e:
-                logging.info(f"Exception: {e}")
-
-    await message.answer("Сообщения отправлены!")
+                    broadcast_engine: BroadcastEngine) -> None:
+    title = "Отправка сообщения всем пользователям о том, что мы идем на ремонты"
+    status_message = await message.answer(title)
+    broadcast_engine.spawn(notify_all_users(
+        status_message, i18n, broadcast_engine, "to_go_repair", title))
 
 
 @admin_handlers_router.message(Command(commands=["back_work"]))
 async def back_work(message: Message,
-                    config: Config,
-                    bot: Bot,
                     i18n: I18nContext,
-                    dialog_manager: DialogManager) -> None:
-    await message.answer("Отправка сообщения всем пользователям о том, что мы вернулись")
-
-    users = await User.get_all()
-    for user in users:
-        if user.id != message.chat.id:
-            await i18n.set_locale(user.language_code)
-            _ = i18n.get
-
-            try:
-                await bot.send_message(chat_id=user.id, text=_("back_from_repair"))
-            except Exception as e:
-                logging.info(f"Exception: {e}")
-
-    await message.answer("Сообщения отправлены!")
+                    broadcast_engine: BroadcastEngine) -> None:
+    title = "Отправка сообщения всем пользователям о том, что мы вернулись"
+    status_message = await message.answer(title)
+    broadcast_engine.spawn(notify_all_users(
+        status_message, i18n, broadcast_engine, "back_from_repair", title))
 
 
 @admin_handlers_router.message(Command(commands=["del_admin"]))
@@ -1,8 +1,13 @@
 import logging
+from typing import AsyncIterator
 
 from aiogram import Bot, exceptions
 from aiogram_dialog import DialogManager, ShowMode
 
+from tgbot.services.edit_scheduler import EditScheduler
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
 
 async def rerender_window(dialog_manager: DialogManager, chat_id: int):
     bot = dialog_manager.middleware_data['bot']
@@ -16,3 +21,38 @@ async def rerender_window(dialog_manager: DialogManager, chat_id: int):
                                  chat_id=chat_id)
     except (AssertionError, exceptions.AiogramError):
         logging.warning("Stack update error")
+
+
+async def stream_to_message(bot: Bot,
+                            edit_scheduler: EditScheduler,
+                            chat_id: int,
+                            stream: AsyncIterator[str]) -> str:
+    """
+    Progressively show the stream in a temporary message.
+
+    The message is sent with the first text of the stream and edited through
+    the EditScheduler, so only the latest text is sent within Telegram rate
+    limits. The message is deleted when the stream ends or fails.
+
+    :return: the final text of the stream.
+    """
+    text = ""
+    message_id = None
+    try:
+        async for text in stream:
+            if message_id is None:
+                message = await bot.send_message(chat_id=chat_id,
+                                                 text=text[:TELEGRAM_MESSAGE_LIMIT])
+                message_id = message.message_id
+            else:
+                edit_scheduler.schedule(chat_id, message_id,
+                                        text[:TELEGRAM_MESSAGE_LIMIT])
+    finally:
+        if message_id is not None:
+            edit_scheduler.forget(chat_id, message_id)
+            try:
+                await bot.delete_message(chat_id=chat_id, message_id=message_id)
+            except exceptions.TelegramAPIError:
+                # Если удалить не удалось, не критично
+                pass
+    return text
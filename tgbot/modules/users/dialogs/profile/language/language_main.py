@@ -13,7 +13,8 @@ from aiogram_dialog.widgets.text import Const, Format
 from aiogram_i18n import I18nContext
 
 # from services.broadcaster import broadcast_media_group, broadcast_plus
-from infrastructure.database.models import User, Language
+from infrastructure.database.language_catalog import LanguageCatalog
+from infrastructure.database.models import User
 from tgbot.helpers.utils import create_absolute_path
 from tgbot.modules.common.buttons import back_btn, close_dialog_back_btn
 from .states import LanguageState
@@ -24,7 +25,8 @@ async def data_getter(dialog_manager: DialogManager,
                       **_kwargs) -> Dict[str, Any | None]:
     _ = i18n.get
 
-    languages = await Language.get_all()
+    language_catalog: LanguageCatalog = dialog_manager.middleware_data["language_catalog"]
+    languages = language_catalog.all()
 
     return {
         "select_lang": _("select_lang"),
@@ -25,7 +25,7 @@ async def data_getter(dialog_manager: DialogManager,
                       **_kwargs) -> Dict[str, Any | None]:
     _ = i18n.get
 
-    user = await User.get(dialog_manager.event.message.chat.id)
+    user = await User.get_profile(dialog_manager.event.message.chat.id)
 
     return {
         "language": f"🔄  {_('language').capitalize()}",
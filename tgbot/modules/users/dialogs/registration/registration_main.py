@@ -13,7 +13,8 @@ from aiogram_dialog.widgets.text import Const, Format
 from aiogram_i18n import I18nContext
 
 # from services.broadcaster import broadcast_media_group, broadcast_plus
-from infrastructure.database.models import Language, User
+from infrastructure.database.language_catalog import LanguageCatalog
+from infrastructure.database.models import User
 from tgbot.modules.users.dialogs.states import UserStates
 from tgbot.helpers.utils import create_absolute_path
 from tgbot.modules.common.buttons import back_btn, close_dialog_back_btn
@@ -27,7 +28,8 @@ async def data_getter(dialog_manager: DialogManager,
 
     user_nickname = dialog_manager.dialog_data.get("user_nickname", None)
     lang_name = dialog_manager.dialog_data.get("lang_name", None)
-    languages = await Language.get_all()
+    language_catalog: LanguageCatalog = dialog_manager.middleware_data["language_catalog"]
+    languages = language_catalog.all()
 
     return {
         "select_lang": _("select_lang"),
@@ -48,7 +50,8 @@ async def select_native_language(call: types.CallbackQuery,
                                  select,
                                  dialog_manager: DialogManager,
                                  data: str):
-    language = await Language.get(int(data))
+    language_catalog: LanguageCatalog = dialog_manager.middleware_data["language_catalog"]
+    language = language_catalog.get(int(data))
     dialog_manager.dialog_data["lang_name"] = language.title
     dialog_manager.dialog_data["lang_code"] = language.code
 
@@ -70,12 +73,15 @@ async def confirm_post_data(call: types.CallbackQuery,
                             dialog_manager: DialogManager):
     lang_code = dialog_manager.dialog_data["lang_code"]
     user_nickname = dialog_manager.dialog_data["user_nickname"]
-    await User.add_new(user_id=call.message.chat.id,
-                       username=user_nickname,
-                       language_code=lang_code,
-                       tg_username=call.from_user.username,
-                       tg_last_name=call.from_user.last_name,
-                       tg_first_name=call.from_user.first_name,)
+    # Повторное нажатие не падает на дубликате, а обновляет данные
+    await User.upsert({"id": call.message.chat.id,
+                       "username": user_nickname,
+                       "language_code": lang_code,
+                       "tg_username": call.from_user.username,
+                       "tg_last_name": call.from_user.last_name,
+                       "tg_first_name": call.from_user.first_name},
+                      update_fields=["username", "language_code",
+                                     "tg_username", "tg_last_name", "tg_first_name"])
     await dialog_manager.next()
 
 
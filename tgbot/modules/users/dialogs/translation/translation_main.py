@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from functools import partial
 from typing import Any, Dict
 from string import Template
 
@@ -12,34 +13,29 @@ from aiogram_dialog.widgets.kbd import Button, ScrollingGroup, Select
 from aiogram_dialog.widgets.text import Const, Format
 from aiogram_i18n import I18nContext
 
-from langchain_core.messages import AIMessage, HumanMessage
-from langchain_community.chat_message_histories import ChatMessageHistory
-
 # Убираем GoogleTranslator - общаемся с Gemini напрямую
 
 # from services.broadcaster import broadcast_media_group, broadcast_plus
-from infrastructure.database.models import Language
-from tgbot.services.api_manager import GoogleClient
-from tgbot.config import Config
+from infrastructure.database.language_catalog import LanguageCatalog
+from tgbot.services.api_manager import AIClientsRegistry, ProviderRouter, with_thinking_phases
+from tgbot.services.edit_scheduler import EditScheduler
+from tgbot.services.conversation_store import BaseConversationStore
+from tgbot.services.history_manager import AI_ROLE, USER_ROLE, HistoryManager
+from tgbot.services.llm_scheduler import LLMScheduler, SchedulerBusy
+from tgbot.services.translation_cache import TranslationCache
 from tgbot.helpers.utils import get_ai_system_message
 # Удаляем неиспользуемый импорт create_absolute_path
 from tgbot.modules.common.buttons import back_btn, close_dialog_back_btn
+from tgbot.modules.common.functions import stream_to_message
 from .states import TranslationState
 
 
 async def on_start(data, dialog_manager: DialogManager):
-    config: Config = dialog_manager.middleware_data.get("config")
-    system_message = get_ai_system_message()
-
-    google_client = GoogleClient(api_key=config.tg_bot.gemini_api_key,
-                                 system_message=system_message,
-                                 proxy_url=config.tg_bot.proxy_url)
-
-    # Тестируем прокси при первом запуске
-    if config.tg_bot.proxy_url:
-        await google_client.test_proxy_connection()
-
-    dialog_manager.dialog_data["google_client"] = google_client
+    # В dialog_data храним только id разговора, сама история лежит в хранилище
+    conversation_id = f"translation:{dialog_manager.event.from_user.id}"
+    conversation_store: BaseConversationStore = dialog_manager.middleware_data["conversation_store"]
+    await conversation_store.clear(conversation_id)
+    dialog_manager.dialog_data["conversation_id"] = conversation_id
 
 
 async def data_getter(dialog_manager: DialogManager,
@@ -51,7 +47,8 @@ async def data_getter(dialog_manager: DialogManager,
         "ai_answer", _('start_translate'))
     src_lang_name = dialog_manager.dialog_data.get("src_lang_name", None)
     target_lang_name = dialog_manager.dialog_data.get("target_lang_name", None)
-    languages = await Language.get_all()
+    language_catalog: LanguageCatalog = dialog_manager.middleware_data["language_catalog"]
+    languages = language_catalog.all()
 
     return {
         "select_src_lang": _("select_src_lang"),
@@ -64,10 +61,35 @@ async def data_getter(dialog_manager: DialogManager,
     }
 
 
+def get_translation_request(dialog_manager: DialogManager, text: str) -> str:
+    """Wrap the user text into a request for the selected language pair."""
+    src_lang_name = dialog_manager.dialog_data["src_lang_name"]
+    target_lang_name = dialog_manager.dialog_data["target_lang_name"]
+    return f"{src_lang_name} → {target_lang_name}:\n{text}"
+
+
 async def get_ai_answer(message: types.Message,
                         message_input: MessageInput,
                         dialog_manager: DialogManager) -> None:
     bot: Bot = dialog_manager.middleware_data.get("bot")
+    translation_cache: TranslationCache = dialog_manager.middleware_data["translation_cache"]
+    conversation_store: BaseConversationStore = dialog_manager.middleware_data["conversation_store"]
+    history_manager: HistoryManager = dialog_manager.middleware_data["history_manager"]
+    conversation_id = dialog_manager.dialog_data["conversation_id"]
+    src_lang_code = dialog_manager.dialog_data["src_lang_code"]
+    target_lang_code = dialog_manager.dialog_data["target_lang_code"]
+    user_request = get_translation_request(dialog_manager, message.text)
+
+    # Повторяющиеся фразы отдаем из кэша, не обращаясь к платному API
+    cached_answer = await translation_cache.get(
+        src_lang_code, target_lang_code, message.text)
+    if cached_answer is not None:
+        await conversation_store.append(conversation_id, USER_ROLE, user_request,
+                                        history_manager.count_tokens(user_request))
+        await conversation_store.append(conversation_id, AI_ROLE, cached_answer,
+                                        history_manager.count_tokens(cached_answer))
+        dialog_manager.dialog_data["ai_answer"] = cached_answer
+        return
 
     # Отправляем статус "typing"
     await bot.send_chat_action(
@@ -75,83 +97,52 @@ async def get_ai_answer(message: types.Message,
         action="typing"
     )
 
-    # Отправляем начальное сообщение для последующего редактирования
-    thinking_message = await bot.send_message(
-        chat_id=message.chat.id,
-        text="🧠 Ойла йеш ву..."
-    )
-
+    # Запросы к ИИ идут через общий планировщик: не больше одного на пользователя
+    llm_scheduler: LLMScheduler = dialog_manager.middleware_data["llm_scheduler"]
     try:
-        # Получаем историю сообщений или создаем новую
-        chat_history: ChatMessageHistory = dialog_manager.dialog_data.get(
-            "chat_history", None)
-        if not chat_history:
-            chat_history = ChatMessageHistory()
+        await llm_scheduler.acquire(message.from_user.id)
+    except SchedulerBusy:
+        i18n: I18nContext = dialog_manager.middleware_data["i18n"]
+        dialog_manager.dialog_data["ai_answer"] = i18n.get("llm_busy")
+        return
 
+    try:
         user_message = message.text
 
         # Добавляем сообщение пользователя в историю
-        chat_history.add_user_message(
-            HumanMessage(content=user_message)
-        )
-
-        # Ограничиваем историю до 10 сообщений (20 объектов: 10 пользователя + 10 ИИ)
-        if len(chat_history.messages) > 20:
-            # Удаляем старые сообщения, оставляем последние 20
-            chat_history.messages = chat_history.messages[-20:]
-
-        # Получаем ответ от Gemini с thinking progress
-        google_client: GoogleClient = dialog_manager.dialog_data["google_client"]
-
-        # Используем thinking progress с редактированием одного сообщения
-        final_answer = None
-        async for thinking_update in google_client.async_get_response_with_thinking(chat_history.messages):
-            # Редактируем сообщение с текущим статусом мышления
-            try:
-                await bot.edit_message_text(
-                    chat_id=message.chat.id,
-                    message_id=thinking_message.message_id,
-                    text=thinking_update
-                )
-            except Exception as edit_error:
-                # Если редактирование не удалось (например, текст не изменился), игнорируем
-                pass
-
-            # Если это не статус мышления (не начинается с 🧠), значит это финальный ответ
-            if not thinking_update.startswith("🧠"):
-                final_answer = thinking_update
-                break
-
-        # Удаляем сообщение с thinking после получения ответа
-        try:
-            await bot.delete_message(
-                chat_id=message.chat.id,
-                message_id=thinking_message.message_id
-            )
-        except Exception:
-            # Если удалить не удалось, не критично
-            pass
-
-        if final_answer and not final_answer.startswith("❌"):
-            # Создаем объект AIMessage для истории
-            from langchain_core.messages import AIMessage
-            ai_message = AIMessage(content=final_answer)
-            chat_history.add_ai_message(ai_message)
-            dialog_manager.dialog_data["chat_history"] = chat_history
+        await conversation_store.append(conversation_id, USER_ROLE, user_request,
+                                        history_manager.count_tokens(user_request))
+
+        # Получаем клиент ИИ (роутер между провайдерами)
+        ai_clients: AIClientsRegistry = dialog_manager.middleware_data["ai_clients"]
+        ai_client: ProviderRouter = ai_clients.get_client(
+            get_ai_system_message())
+
+        # Держим историю в бюджете токенов, старые реплики сворачиваем в резюме
+        prompt_messages = await history_manager.prepare(
+            conversation_store, conversation_id,
+            partial(ai_client.async_summarize, dialog="translation"))
+
+        # Стримим ответ во временное сообщение, пока модель молчит - показываем фазы мышления
+        edit_scheduler: EditScheduler = dialog_manager.middleware_data["edit_scheduler"]
+        final_answer = await stream_to_message(
+            bot,
+            edit_scheduler,
+            chat_id=message.chat.id,
+            stream=with_thinking_phases(
+                ai_client.async_stream_response(prompt_messages, dialog="translation")))
+
+        if final_answer:
+            # Сохраняем ответ ИИ в историю
+            await conversation_store.append(conversation_id, AI_ROLE, final_answer,
+                                            history_manager.count_tokens(final_answer))
+            await translation_cache.set(src_lang_code, target_lang_code,
+                                        user_message, final_answer)
 
         # Обновляем данные диалога с финальным ответом
         dialog_manager.dialog_data["ai_answer"] = final_answer or "❌ Не удалось получить ответ"
 
     except Exception as e:
-        # Пытаемся удалить thinking сообщение в случае ошибки
-        try:
-            await bot.delete_message(
-                chat_id=message.chat.id,
-                message_id=thinking_message.message_id
-            )
-        except Exception:
-            pass
-
         # Детальная обработка ошибок
         import traceback
         error_details = traceback.format_exc()
@@ -159,13 +150,16 @@ async def get_ai_answer(message: types.Message,
 
         error_message = f"❌ Ошибка: {str(e)}"
         dialog_manager.dialog_data["ai_answer"] = error_message
+    finally:
+        llm_scheduler.release(message.from_user.id)
 
 
 async def select_src_language(call: types.CallbackQuery,
                               select,
                               dialog_manager: DialogManager,
                               data: str):
-    language = await Language.get(int(data))
+    language_catalog: LanguageCatalog = dialog_manager.middleware_data["language_catalog"]
+    language = language_catalog.get(int(data))
     dialog_manager.dialog_data["src_lang_name"] = language.title
     dialog_manager.dialog_data["src_lang_code"] = language.code
     await dialog_manager.next()
@@ -175,7 +169,8 @@ async def select_target_language(call: types.CallbackQuery,
                                  select,
                                  dialog_manager: DialogManager,
                                  data: str):
-    language = await Language.get(int(data))
+    language_catalog: LanguageCatalog = dialog_manager.middleware_data["language_catalog"]
+    language = language_catalog.get(int(data))
     dialog_manager.dialog_data["target_lang_name"] = language.title
     dialog_manager.dialog_data["target_lang_code"] = language.code
     await dialog_manager.next()
@@ -40,7 +40,7 @@ async def add_admin(message: Message,
 async def process_start_command(message: Message,
                                 i18n: I18nContext,
                                 dialog_manager: DialogManager) -> None:
-    user = await User.get(message.chat.id)
+    user = await User.get_profile(message.chat.id)
     if not user:
         await i18n.set_locale("en")
         await dialog_manager.start(UserRegistrationState.START)
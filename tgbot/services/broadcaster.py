@@ -1,10 +1,55 @@
 import asyncio
 import logging
-from typing import Union
+import time
+from typing import Awaitable, Callable, Collection, Coroutine, Optional, Union
 
 from aiogram import Bot
 from aiogram import exceptions
 from aiogram.types import InlineKeyboardMarkup
+from redis.asyncio import Redis
+
+from infrastructure.database.models import Broadcast, BroadcastRecipient, User
+from tgbot.services.redis_lease import RedisLease
+
+ProgressCallback = Callable[[Broadcast], Awaitable[None]]
+
+
+class TokenBucket:
+    """
+    Global rate limiter for outgoing messages.
+
+    Tokens are refilled at ``rate`` per second up to ``capacity``. ``pause``
+    stops the whole bucket, so one flood error slows down every sender,
+    not just the one that got it.
+    """
+
+    def __init__(self, rate: float = 25.0, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    self._updated = time.monotonic()
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
 
 
 async def send_message(
@@ -13,6 +58,8 @@ async def send_message(
     text: str,
     disable_notification: bool = False,
     reply_markup: InlineKeyboardMarkup = None,
+    bucket: Optional[TokenBucket] = None,
+    max_attempts: int = 5,
 ) -> bool:
     """
     Safe messages sender
@@ -22,32 +69,41 @@ async def send_message(
     :param text: text of the message.
     :param disable_notification: disable notification or not.
     :param reply_markup: reply markup.
+    :param bucket: shared rate limiter, paused on flood errors.
+    :param max_attempts: how many times to try after flood errors.
     :return: success.
     """
-    try:
-        await bot.send_message(
-            user_id,
-            text,
-            disable_notification=disable_notification,
-            reply_markup=reply_markup,
-        )
-    except exceptions.TelegramBadRequest as e:
-        logging.error("Telegram server says - Bad Request: chat not found")
-    except exceptions.TelegramForbiddenError:
-        logging.error(f"Target [ID:{user_id}]: got TelegramForbiddenError")
-    except exceptions.TelegramRetryAfter as e:
-        logging.error(
-            f"Target [ID:{user_id}]: Flood limit is exceeded. Sleep {e.retry_after} seconds."
-        )
-        await asyncio.sleep(e.retry_after)
-        return await send_message(
-            bot, user_id, text, disable_notification, reply_markup
-        )  # Recursive call
-    except exceptions.TelegramAPIError:
-        logging.exception(f"Target [ID:{user_id}]: failed")
-    else:
-        logging.info(f"Target [ID:{user_id}]: success")
-        return True
+    for _ in range(max_attempts):
+        if bucket is not None:
+            await bucket.acquire()
+        try:
+            await bot.send_message(
+                user_id,
+                text,
+                disable_notification=disable_notification,
+                reply_markup=reply_markup,
+            )
+        except exceptions.TelegramBadRequest as e:
+            logging.error(f"Target [ID:{user_id}]: Telegram server says - Bad Request: {e.message}")
+        except exceptions.TelegramForbiddenError:
+            logging.error(f"Target [ID:{user_id}]: got TelegramForbiddenError")
+        except exceptions.TelegramRetryAfter as e:
+            logging.error(
+                f"Target [ID:{user_id}]: Flood limit is exceeded. Sleep {e.retry_after} seconds."
+            )
+            if bucket is not None:
+                bucket.pause(e.retry_after)
+            else:
+                await asyncio.sleep(e.retry_after)
+            continue
+        except exceptions.TelegramAPIError:
+            logging.exception(f"Target [ID:{user_id}]: failed")
+        else:
+            logging.debug(f"Target [ID:{user_id}]: success")
+            return True
+        return False
+
+    logging.error(f"Target [ID:{user_id}]: gave up after {max_attempts} flood errors")
     return False
 
 
@@ -57,27 +113,243 @@ async def broadcast(
     text: str,
     disable_notification: bool = False,
     reply_markup: InlineKeyboardMarkup = None,
+    bucket: Optional[TokenBucket] = None,
+    concurrency: int = 8,
 ) -> int:
     """
-    Simple broadcaster.
+    Simple broadcaster without saved progress, for short lists like admins.
     :param bot: Bot instance.
     :param users: List of users.
     :param text: Text of the message.
     :param disable_notification: Disable notification or not.
     :param reply_markup: Reply markup.
+    :param bucket: Shared rate limiter (Limit: 30 messages per second).
+    :param concurrency: Number of concurrent senders.
     :return: Count of messages.
     """
+    bucket = bucket or TokenBucket()
+    queue = iter(users)
     count = 0
-    try:
-        for user_id in users:
+
+    async def worker():
+        nonlocal count
+        for user_id in queue:
             if await send_message(
-                bot, user_id, text, disable_notification, reply_markup
+                bot, user_id, text, disable_notification, reply_markup, bucket
             ):
                 count += 1
-            await asyncio.sleep(
-                0.05
-            )  # 20 messages per second (Limit: 30 messages per second)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
     finally:
         logging.info(f"{count} messages successful sent.")
 
     return count
+
+
+class BroadcastEngine:
+    """
+    Broadcaster with progress saved in the database.
+
+    Recipients are stored in ``broadcast_recipients``. ``concurrency``
+    senders share one TokenBucket, and every ``batch_size`` results are
+    checkpointed. After a restart ``resume`` continues unfinished
+    broadcasts from the recipients that are still pending.
+
+    With ``redis`` several replicas share the broadcasts: each run holds a
+    lease, so a broadcast is sent by one replica at a time, and ``watch``
+    resumes broadcasts whose replica stopped or crashed.
+    """
+
+    def __init__(self,
+                 bot: Bot,
+                 rate: float = 25.0,
+                 concurrency: int = 8,
+                 batch_size: int = 500,
+                 redis: Optional[Redis] = None,
+                 lease: float = 30.0,
+                 prefix: str = "broadcast"):
+        self.bot = bot
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.redis = redis
+        self.lease = lease
+        self.prefix = prefix
+        self._tasks: set[asyncio.Task] = set()
+        self._running: set[int] = set()
+
+    async def create(self,
+                     text: str,
+                     user_ids: list[int],
+                     disable_notification: bool = False) -> Broadcast:
+        user_ids = list(dict.fromkeys(user_ids))
+        async with Broadcast.unit_of_work():
+            broadcast = await Broadcast.add_new(text=text,
+                                                disable_notification=disable_notification,
+                                                total=len(user_ids))
+            await BroadcastRecipient.add_recipients(broadcast.id, user_ids)
+        logging.info(f"Broadcast #{broadcast.id} created for {len(user_ids)} users")
+        return broadcast
+
+    async def create_localized(self,
+                               render: Callable[[str], str],
+                               exclude: Collection[int] = (),
+                               disable_notification: bool = False) -> list[Broadcast]:
+        """
+        Create one broadcast per user language.
+
+        Users are streamed from the database with a server-side cursor, and
+        ``render`` is called once per language code to build the text.
+        """
+        users_by_locale: dict[str, list[int]] = {}
+        async for user_id, language_code in User.stream(User.id, User.language_code,
+                                                        yield_per=self.batch_size):
+            if user_id not in exclude:
+                users_by_locale.setdefault(language_code, []).append(user_id)
+
+        return [await self.create(render(locale), user_ids, disable_notification)
+                for locale, user_ids in users_by_locale.items()]
+
+    def start(self,
+              broadcast: Broadcast,
+              on_progress: Optional[ProgressCallback] = None) -> asyncio.Task:
+        """Run the broadcast in the background."""
+        return self.spawn(self.run(broadcast, on_progress))
+
+    def spawn(self, coro: Coroutine) -> asyncio.Task:
+        """Run a broadcast job in the background, it is cancelled on ``close``."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error("Broadcast job failed, unfinished broadcasts are resumed after restart",
+                          exc_info=task.exception())
+
+    def _lease_key(self, broadcast_id: int) -> str:
+        return f"{self.prefix}:{broadcast_id}:lease"
+
+    async def resume(self) -> None:
+        for broadcast in await Broadcast.get_unfinished():
+            if broadcast.id in self._running:
+                continue
+            # Рассылку уже отправляет другая реплика
+            if self.redis is not None and await self.redis.exists(self._lease_key(broadcast.id)):
+                continue
+            logging.info(f"Resuming broadcast #{broadcast.id}: "
+                         f"{broadcast.sent + broadcast.failed}/{broadcast.total} done")
+            self.start(broadcast)
+
+    async def watch(self) -> None:
+        """Periodically resume broadcasts left by stopped or crashed replicas."""
+        while True:
+            await asyncio.sleep(self.lease)
+            try:
+                await self.resume()
+            except Exception:
+                logging.exception("Failed to check unfinished broadcasts")
+
+    async def close(self) -> None:
+        """Stop running broadcasts, their progress is kept for ``resume``."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def run(self,
+                  broadcast: Broadcast,
+                  on_progress: Optional[ProgressCallback] = None) -> Broadcast:
+        """
+        Send the broadcast and mark it done.
+
+        If it is already sent here or by another replica, it is returned at
+        once and its status stays ``RUNNING``.
+        """
+        if broadcast.id in self._running:
+            return broadcast
+        lease = None
+        if self.redis is not None:
+            lease = RedisLease(self.redis, self._lease_key(broadcast.id), self.lease)
+            if not await lease.acquire():
+                logging.info(f"Broadcast #{broadcast.id} is sent by another replica")
+                return broadcast
+
+        self._running.add(broadcast.id)
+        try:
+            return await self._send(broadcast, on_progress, lease)
+        finally:
+            self._running.discard(broadcast.id)
+            if lease is not None:
+                await lease.release()
+
+    async def _send(self,
+                    broadcast: Broadcast,
+                    on_progress: Optional[ProgressCallback],
+                    lease: Optional[RedisLease]) -> Broadcast:
+        queue: asyncio.Queue[Optional[int]] = asyncio.Queue(maxsize=self.batch_size * 2)
+        sent: list[int] = []
+        failed: list[int] = []
+
+        async def checkpoint():
+            nonlocal sent, failed
+            if not sent and not failed:
+                return
+            batch_sent, batch_failed = sent, failed
+            sent, failed = [], []
+            await BroadcastRecipient.set_status(broadcast.id, batch_sent, BroadcastRecipient.SENT)
+            await BroadcastRecipient.set_status(broadcast.id, batch_failed, BroadcastRecipient.FAILED)
+            await Broadcast.add_progress(broadcast.id, len(batch_sent), len(batch_failed))
+            broadcast.sent += len(batch_sent)
+            broadcast.failed += len(batch_failed)
+            if on_progress is not None:
+                try:
+                    await on_progress(broadcast)
+                except Exception as e:
+                    logging.warning(f"Broadcast #{broadcast.id} progress callback failed: {e}")
+
+        async def produce():
+            after_user_id = None
+            while True:
+                user_ids = await BroadcastRecipient.get_pending(
+                    broadcast.id, after_user_id, self.batch_size)
+                if not user_ids:
+                    break
+                for user_id in user_ids:
+                    await queue.put(user_id)
+                after_user_id = user_ids[-1]
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work():
+            while (user_id := await queue.get()) is not None:
+                ok = await send_message(self.bot, user_id, broadcast.text,
+                                        broadcast.disable_notification,
+                                        bucket=self.bucket)
+                (sent if ok else failed).append(user_id)
+                if len(sent) + len(failed) >= self.batch_size:
+                    await checkpoint()
+
+        async def send_all():
+            async with asyncio.TaskGroup() as group:
+                group.create_task(produce())
+                for _ in range(self.concurrency):
+                    group.create_task(work())
+
+        try:
+            if lease is None:
+                await send_all()
+            else:
+                # Потеряв аренду, останавливаемся: рассылку могла подхватить другая реплика
+                await lease.hold(send_all())
+        finally:
+            # Сохраняем то, что успели отправить, даже если рассылку остановили
+            await checkpoint()
+
+        await Broadcast.update(broadcast.id, status=Broadcast.DONE)
+        broadcast.status = Broadcast.DONE
+        logging.info(f"Broadcast #{broadcast.id} finished: "
+                     f"{broadcast.sent} sent, {broadcast.failed} failed")
+        return broadcast
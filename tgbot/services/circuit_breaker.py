@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit is open and requests fail fast."""
+
+
+class RetryBudget:
+    """
+    Retry budget shared by all requests to one upstream.
+
+    Every request deposits ``ratio`` tokens and every retry spends one,
+    so retries stay a bounded fraction of traffic instead of multiplying
+    load when the upstream is already failing.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker around calls to an upstream API.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast with ``CircuitOpenError`` for ``cooldown`` seconds. Then
+    one probe call is let through (half-open): its success closes the
+    circuit, its failure opens it again.
+    """
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = 5,
+                 cooldown: float = 30.0,
+                 max_attempts: int = 3,
+                 retry_budget: RetryBudget | None = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_attempts = max_attempts
+        self.retry_budget = retry_budget or RetryBudget()
+
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """
+        Raise CircuitOpenError if the call has to fail fast.
+
+        :return: True if the call is the half-open probe. Only such a call
+            may give the probe back with ``cancel_probe``.
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half-open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        raise CircuitOpenError(f"Circuit {self.name} is open")
+
+    def cancel_probe(self) -> None:
+        """Forget an unfinished probe, so a cancelled call does not keep the circuit open."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info(f"Circuit {self.name} closed")
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probe_in_flight or self._failures >= self.failure_threshold:
+            if self._opened_at is None or self._probe_in_flight:
+                logger.warning(
+                    f"Circuit {self.name} opened for {self.cooldown} s "
+                    f"after {self._failures} failures")
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    async def call(self,
+                   request: Callable[[], Awaitable[R]],
+                   retriable: Callable[[Exception], bool] = lambda e: True) -> R:
+        """
+        Run the request through the breaker, retrying retriable errors
+        while the shared retry budget allows it.
+        """
+        self.retry_budget.deposit()
+        attempt = 1
+        while True:
+            probe = self.allow()
+            try:
+                result = await request()
+            except asyncio.CancelledError:
+                if probe:
+                    self.cancel_probe()
+                raise
+            except Exception as e:
+                self.record_failure()
+                if (attempt >= self.max_attempts
+                        or not retriable(e)
+                        or self.state != "closed"
+                        or not self.retry_budget.try_spend()):
+                    raise
+                attempt += 1
+                logger.info(f"Circuit {self.name}: retry #{attempt - 1} after {type(e).__name__}")
+                continue
+            self.record_success()
+            return result
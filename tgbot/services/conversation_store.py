@@ -0,0 +1,180 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import NamedTuple, Optional
+
+from redis.asyncio import Redis
+
+
+class ConversationTurn(NamedTuple):
+    role: str  # "user" or "ai"
+    text: str
+    tokens: int
+
+
+class BaseConversationStore(ABC):
+    """
+    Append-only ring buffer of conversation turns per conversation id.
+
+    Only compact (role, text, tokens) tuples are stored, so the dialogs keep
+    just the conversation id and FSM storage stays serializable.
+    """
+
+    def __init__(self, max_turns: int = 100):
+        self.max_turns = max_turns
+
+    @abstractmethod
+    async def append(self, conversation_id: str, role: str, text: str, tokens: int) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, conversation_id: str) -> list[ConversationTurn]:
+        ...
+
+    @abstractmethod
+    async def trim(self, conversation_id: str, keep: int) -> None:
+        """Keep only the last ``keep`` turns."""
+
+    @abstractmethod
+    async def get_summary(self, conversation_id: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set_summary(self, conversation_id: str, summary: Optional[str]) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self, conversation_id: str) -> None:
+        ...
+
+
+class MemoryConversationStore(BaseConversationStore):
+    """
+    Conversations in process memory. A conversation is dropped after
+    ``ttl`` seconds without access, and the least recently used ones are
+    dropped when there are more than ``max_conversations``.
+    """
+
+    def __init__(self,
+                 max_turns: int = 100,
+                 ttl: int = 7 * 86400,
+                 max_conversations: int = 10_000):
+        super().__init__(max_turns)
+        self.ttl = ttl
+        self.max_conversations = max_conversations
+        self._turns: dict[str, deque[ConversationTurn]] = {}
+        self._summaries: dict[str, str] = {}
+        # Время последнего обращения, от давних разговоров к недавним
+        self._accessed: OrderedDict[str, float] = OrderedDict()
+
+    def _touch(self, conversation_id: str) -> None:
+        now = time.monotonic()
+        self._accessed[conversation_id] = now
+        self._accessed.move_to_end(conversation_id)
+        while self._accessed:
+            oldest, accessed = next(iter(self._accessed.items()))
+            if len(self._accessed) <= self.max_conversations and now - accessed < self.ttl:
+                break
+            self._forget(oldest)
+
+    def _forget(self, conversation_id: str) -> None:
+        self._accessed.pop(conversation_id, None)
+        self._turns.pop(conversation_id, None)
+        self._summaries.pop(conversation_id, None)
+
+    def _expire(self, conversation_id: str) -> None:
+        accessed = self._accessed.get(conversation_id)
+        if accessed is not None and time.monotonic() - accessed >= self.ttl:
+            self._forget(conversation_id)
+
+    async def append(self, conversation_id: str, role: str, text: str, tokens: int) -> None:
+        self._expire(conversation_id)
+        self._touch(conversation_id)
+        turns = self._turns.get(conversation_id)
+        if turns is None:
+            turns = self._turns[conversation_id] = deque(maxlen=self.max_turns)
+        turns.append(ConversationTurn(role, text, tokens))
+
+    async def get(self, conversation_id: str) -> list[ConversationTurn]:
+        self._expire(conversation_id)
+        if conversation_id in self._accessed:
+            self._touch(conversation_id)
+        return list(self._turns.get(conversation_id, ()))
+
+    async def trim(self, conversation_id: str, keep: int) -> None:
+        turns = self._turns.get(conversation_id)
+        if not turns:
+            return
+        while len(turns) > keep:
+            turns.popleft()
+
+    async def get_summary(self, conversation_id: str) -> Optional[str]:
+        self._expire(conversation_id)
+        return self._summaries.get(conversation_id)
+
+    async def set_summary(self, conversation_id: str, summary: Optional[str]) -> None:
+        self._expire(conversation_id)
+        if summary:
+            self._touch(conversation_id)
+            self._summaries[conversation_id] = summary
+        else:
+            self._summaries.pop(conversation_id, None)
+
+    async def clear(self, conversation_id: str) -> None:
+        self._forget(conversation_id)
+
+
+class RedisConversationStore(BaseConversationStore):
+    def __init__(self,
+                 redis: Redis,
+                 max_turns: int = 100,
+                 ttl: int = 7 * 86400,
+                 prefix: str = "conversation"):
+        super().__init__(max_turns)
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _turns_key(self, conversation_id: str) -> str:
+        return f"{self.prefix}:{conversation_id}:turns"
+
+    def _summary_key(self, conversation_id: str) -> str:
+        return f"{self.prefix}:{conversation_id}:summary"
+
+    async def append(self, conversation_id: str, role: str, text: str, tokens: int) -> None:
+        key = self._turns_key(conversation_id)
+        value = json.dumps([role, text, tokens], ensure_ascii=False)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, value)
+            pipe.ltrim(key, -self.max_turns, -1)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def get(self, conversation_id: str) -> list[ConversationTurn]:
+        values = await self.redis.lrange(self._turns_key(conversation_id), 0, -1)
+        return [ConversationTurn(*json.loads(value)) for value in values]
+
+    async def trim(self, conversation_id: str, keep: int) -> None:
+        key = self._turns_key(conversation_id)
+        if keep <= 0:
+            await self.redis.delete(key)
+        else:
+            await self.redis.ltrim(key, -keep, -1)
+
+    async def get_summary(self, conversation_id: str) -> Optional[str]:
+        value = await self.redis.get(self._summary_key(conversation_id))
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    async def set_summary(self, conversation_id: str, summary: Optional[str]) -> None:
+        key = self._summary_key(conversation_id)
+        if summary:
+            await self.redis.set(key, summary, ex=self.ttl)
+        else:
+            await self.redis.delete(key)
+
+    async def clear(self, conversation_id: str) -> None:
+        await self.redis.delete(self._turns_key(conversation_id),
+                                self._summary_key(conversation_id))
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+from aiogram import Bot
+from aiogram import exceptions
+
+logger = logging.getLogger(__name__)
+
+
+class EditScheduler:
+    """
+    Rate-limit-aware coalescer for progressive message edits.
+
+    Only the latest pending text is kept per (chat, message) and every chat
+    is flushed at most once per ``interval`` seconds. ``TelegramRetryAfter``
+    pauses all edits for the requested time, and edits that would not change
+    the text are dropped before they reach Telegram. The last sent text is
+    remembered for at most ``max_tracked`` messages.
+    """
+
+    def __init__(self, bot: Bot, interval: float = 1.0, max_tracked: int = 10_000):
+        self.bot = bot
+        self.interval = interval
+        self.max_tracked = max_tracked
+
+        self._pending: dict[int, dict[int, str]] = {}
+        self._last_sent: OrderedDict[tuple[int, int], str] = OrderedDict()
+        # Сообщения, чья правка еще летит в Telegram, и те из них, что уже забыты
+        self._in_flight: set[tuple[int, int]] = set()
+        self._forgotten: set[tuple[int, int]] = set()
+        self._workers: dict[int, asyncio.Task] = {}
+        self._paused_until = 0.0
+
+        self.stats = {
+            "scheduled": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "failed": 0,
+            "retry_after": 0,
+        }
+
+    def schedule(self, chat_id: int, message_id: int, text: str) -> None:
+        """
+        Schedule the message text, replacing an edit that is not sent yet.
+        """
+        self.stats["scheduled"] += 1
+        pending = self._pending.get(chat_id, {})
+
+        if message_id in pending:
+            self.stats["coalesced"] += 1
+        elif self._last_sent.get((chat_id, message_id)) == text:
+            self.stats["dropped"] += 1
+            return
+        pending[message_id] = text
+        self._pending[chat_id] = pending
+
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(
+                self._chat_worker(chat_id))
+
+    def forget(self, chat_id: int, message_id: int) -> None:
+        """
+        Drop pending edits and state of the message (e.g. before deleting it).
+        """
+        pending = self._pending.get(chat_id)
+        if pending and pending.pop(message_id, None) is not None:
+            self.stats["dropped"] += 1
+        key = (chat_id, message_id)
+        self._last_sent.pop(key, None)
+        if key in self._in_flight:
+            self._forgotten.add(key)
+
+    async def close(self) -> None:
+        for task in list(self._workers.values()):
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._pending.clear()
+        self._last_sent.clear()
+        self._in_flight.clear()
+        self._forgotten.clear()
+
+    async def _chat_worker(self, chat_id: int) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending.get(chat_id):
+                pause = self._paused_until - loop.time()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                    continue
+
+                pending = self._pending[chat_id]
+                message_id = next(iter(pending))
+                text = pending.pop(message_id)
+
+                retry_after = await self._send(chat_id, message_id, text)
+                if retry_after:
+                    # Возвращаем текст в очередь, если его еще не заменили новым
+                    pending.setdefault(message_id, text)
+                    self._paused_until = max(self._paused_until,
+                                             loop.time() + retry_after)
+                    continue
+
+                await asyncio.sleep(self.interval)
+        finally:
+            self._workers.pop(chat_id, None)
+            if not self._pending.get(chat_id):
+                self._pending.pop(chat_id, None)
+
+    async def _send(self, chat_id: int, message_id: int, text: str) -> float:
+        """
+        Send the edit.
+
+        :return: seconds to wait if Telegram asked to retry later, otherwise 0.
+        """
+        key = (chat_id, message_id)
+        if self._last_sent.get(key) == text:
+            self.stats["dropped"] += 1
+            return 0
+
+        self._in_flight.add(key)
+        try:
+            await self.bot.edit_message_text(chat_id=chat_id,
+                                             message_id=message_id,
+                                             text=text)
+        except exceptions.TelegramRetryAfter as e:
+            self.stats["retry_after"] += 1
+            logger.warning(
+                f"Edit in chat [ID:{chat_id}]: flood limit, retry after {e.retry_after} s")
+            return e.retry_after
+        except exceptions.TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                self.stats["dropped"] += 1
+                self._remember(key, text)
+            else:
+                self.stats["failed"] += 1
+                logger.info(f"Edit in chat [ID:{chat_id}] failed: {e}")
+        except exceptions.TelegramAPIError:
+            self.stats["failed"] += 1
+            logger.exception(f"Edit in chat [ID:{chat_id}] failed")
+        else:
+            self.stats["sent"] += 1
+            self._remember(key, text)
+        finally:
+            self._in_flight.discard(key)
+            self._forgotten.discard(key)
+        return 0
+
+    def _remember(self, key: tuple[int, int], text: str) -> None:
+        # Сообщение забыли, пока правка была в пути - его текст больше не нужен
+        if key in self._forgotten:
+            return
+        self._last_sent[key] = text
+        self._last_sent.move_to_end(key)
+        while len(self._last_sent) > self.max_tracked:
+            self._last_sent.popitem(last=False)
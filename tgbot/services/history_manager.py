@@ -0,0 +1,117 @@
+import logging
+from typing import Awaitable, Callable, Optional
+
+import tiktoken
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from tgbot.services.conversation_store import BaseConversationStore, ConversationTurn
+
+logger = logging.getLogger(__name__)
+
+USER_ROLE = "user"
+AI_ROLE = "ai"
+
+Summarizer = Callable[[list[BaseMessage], Optional[str]], Awaitable[str]]
+
+
+class HistoryManager:
+    """
+    Keeps chat history inside a token budget.
+
+    When the history exceeds ``max_tokens``, the oldest turns are folded
+    into a compact running summary instead of being dropped.
+    """
+
+    def __init__(self,
+                 max_tokens: int = 3000,
+                 keep_last: int = 2,
+                 encoding_name: str = "cl100k_base"):
+        self.max_tokens = max_tokens
+        self.keep_last = keep_last
+        self.encoding_name = encoding_name
+        self._encoding: tiktoken.Encoding | None = None
+        self._encoding_loaded = False
+
+    def count_tokens(self, text: str) -> int:
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            try:
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding is not available: {e}")
+        if self._encoding is None:
+            # Without the encoding file fall back to a rough estimate
+            return len(text) // 4 + 1
+        return len(self._encoding.encode(text))
+
+    async def fit(self,
+                  turns: list[ConversationTurn],
+                  summary: Optional[str],
+                  summarize: Summarizer) -> tuple[list[ConversationTurn], Optional[str]]:
+        """
+        Fit turns into the budget, folding older turns into the summary.
+
+        :return: the kept turns and the updated summary.
+        """
+        budget = self.max_tokens
+        if summary:
+            budget -= self.count_tokens(summary)
+
+        if sum(turn.tokens for turn in turns) <= budget:
+            return turns, summary
+
+        # Keep the newest turns that fit into the budget
+        split = len(turns)
+        used = 0
+        while split > 0 and used + turns[split - 1].tokens <= budget:
+            split -= 1
+            used += turns[split].tokens
+        split = min(split, max(len(turns) - self.keep_last, 0))
+
+        # The kept part has to start with a user message
+        while split < len(turns) - 1 and turns[split].role != USER_ROLE:
+            split += 1
+
+        folded, kept = turns[:split], turns[split:]
+        if not folded:
+            return kept, summary
+
+        try:
+            summary = await summarize(self.to_messages(folded), summary)
+        except Exception as e:
+            logger.warning(f"History summarization failed, old turns dropped: {e}")
+
+        return kept, summary
+
+    async def prepare(self,
+                      store: BaseConversationStore,
+                      conversation_id: str,
+                      summarize: Summarizer) -> list[BaseMessage]:
+        """
+        Fit the stored conversation into the budget and build the prompt messages.
+        """
+        turns = await store.get(conversation_id)
+        summary = await store.get_summary(conversation_id)
+
+        kept, new_summary = await self.fit(turns, summary, summarize)
+        if len(kept) < len(turns):
+            await store.trim(conversation_id, len(kept))
+        if new_summary != summary:
+            await store.set_summary(conversation_id, new_summary)
+
+        return self.build_prompt(kept, new_summary)
+
+    @staticmethod
+    def to_messages(turns: list[ConversationTurn]) -> list[BaseMessage]:
+        return [HumanMessage(content=turn.text) if turn.role == USER_ROLE
+                else AIMessage(content=turn.text)
+                for turn in turns]
+
+    @classmethod
+    def build_prompt(cls, turns: list[ConversationTurn], summary: Optional[str]) -> list[BaseMessage]:
+        """Prepend the running summary to the messages sent to the model."""
+        messages = cls.to_messages(turns)
+        if not summary:
+            return messages
+        return [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"),
+                *messages]
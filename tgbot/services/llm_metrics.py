@@ -0,0 +1,173 @@
+import asyncio
+import bisect
+import logging
+from collections import defaultdict, deque
+from typing import Optional, Sequence
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 21.0, 34.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def classify_error(e: BaseException) -> str:
+    """Map an exception of an AI call to a short outcome label."""
+    if isinstance(e, asyncio.CancelledError):
+        return "cancelled"
+    name = type(e).__name__
+    message = str(e)
+    if name == "CircuitOpenError":
+        return "circuit_open"
+    if "User location is not supported" in message or "Geoblocking" in message:
+        return "geoblock"
+    if isinstance(e, (asyncio.TimeoutError, TimeoutError)) or "Timeout" in name or "DeadlineExceeded" in name:
+        return "timeout"
+    if "RateLimit" in name or "ResourceExhausted" in name or "429" in message:
+        return "rate_limit"
+    if isinstance(e, ValueError):
+        return "empty"
+    return "error"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class LLMMetrics:
+    """
+    In-process metrics of the LLM calls.
+
+    Every upstream call records its latency, token usage and outcome labelled
+    by provider, model, dialog and operation. ``render`` exports them in the
+    Prometheus text format: a latency histogram, p50/p95/p99 over the last
+    ``window`` calls and token counters.
+    """
+
+    LABELS = ("provider", "model", "dialog", "operation")
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._requests: dict[tuple, int] = defaultdict(int)
+        self._buckets: dict[tuple, list[int]] = {}
+        self._latency_sum: dict[tuple, float] = defaultdict(float)
+        self._latency_count: dict[tuple, int] = defaultdict(int)
+        self._recent: dict[tuple, deque[float]] = {}
+        self._input_tokens: dict[tuple, int] = defaultdict(int)
+        self._output_tokens: dict[tuple, int] = defaultdict(int)
+
+    def observe(self,
+                provider: str,
+                model: str,
+                dialog: Optional[str],
+                operation: str,
+                outcome: str,
+                latency: float,
+                input_tokens: int = 0,
+                output_tokens: int = 0) -> None:
+        key = (provider, model, dialog or "unknown", operation)
+        self._requests[key + (outcome,)] += 1
+        self._input_tokens[key] += input_tokens
+        self._output_tokens[key] += output_tokens
+        if outcome != "ok":
+            return
+
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            buckets = self._buckets[key] = [0] * (len(LATENCY_BUCKETS) + 1)
+        buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self._latency_sum[key] += latency
+        self._latency_count[key] += 1
+
+        recent = self._recent.get(key)
+        if recent is None:
+            recent = self._recent[key] = deque(maxlen=self.window)
+        recent.append(latency)
+
+    def percentile(self, key: tuple, q: float) -> Optional[float]:
+        recent = self._recent.get(key)
+        if not recent:
+            return None
+        values = sorted(recent)
+        return values[min(int(len(values) * q), len(values) - 1)]
+
+    def render(self) -> str:
+        lines = [
+            "# HELP llm_requests_total LLM calls by outcome.",
+            "# TYPE llm_requests_total counter",
+        ]
+        for key, value in self._requests.items():
+            lines.append(f"llm_requests_total{_format_labels(self.LABELS + ('outcome',), key)} {value}")
+
+        lines += [
+            "# HELP llm_request_duration_seconds Latency of successful LLM calls.",
+            "# TYPE llm_request_duration_seconds histogram",
+        ]
+        for key, buckets in self._buckets.items():
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), buckets):
+                cumulative += count
+                labels = _format_labels(self.LABELS + ("le",), key + (bound,))
+                lines.append(f"llm_request_duration_seconds_bucket{labels} {cumulative}")
+            labels = _format_labels(self.LABELS, key)
+            lines.append(f"llm_request_duration_seconds_sum{labels} {self._latency_sum[key]:.6f}")
+            lines.append(f"llm_request_duration_seconds_count{labels} {self._latency_count[key]}")
+
+        lines += [
+            f"# HELP llm_request_latency_seconds Latency quantiles over the last {self.window} calls.",
+            "# TYPE llm_request_latency_seconds summary",
+        ]
+        for key in self._recent:
+            for q in QUANTILES:
+                labels = _format_labels(self.LABELS + ("quantile",), key + (q,))
+                lines.append(f"llm_request_latency_seconds{labels} {self.percentile(key, q):.6f}")
+            labels = _format_labels(self.LABELS, key)
+            lines.append(f"llm_request_latency_seconds_sum{labels} {self._latency_sum[key]:.6f}")
+            lines.append(f"llm_request_latency_seconds_count{labels} {self._latency_count[key]}")
+
+        for name, counter, help_text in (
+                ("llm_input_tokens_total", self._input_tokens, "Prompt tokens sent to the model."),
+                ("llm_output_tokens_total", self._output_tokens, "Completion tokens returned by the model.")):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for key, value in counter.items():
+                lines.append(f"{name}{_format_labels(self.LABELS, key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves the metrics on ``http://host:port/metrics``."""
+
+    def __init__(self,
+                 metrics: LLMMetrics,
+                 host: str = "127.0.0.1",
+                 port: int = 9100,
+                 extra: Sequence = ()):
+        self.metrics = metrics
+        self.extra = extra
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        text = "".join(source.render() for source in (self.metrics, *self.extra))
+        return web.Response(text=text, content_type="text/plain")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics are served on http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
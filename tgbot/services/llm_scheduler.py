@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerBusy(Exception):
+    """Raised when the LLM request queue is full."""
+
+
+class LLMScheduler:
+    """
+    Fair concurrency scheduler for LLM calls.
+
+    At most ``max_concurrency`` requests run at once, every user has at most
+    one request in flight, and waiting users are served round-robin, so one
+    user sending many messages can not take up the whole upstream quota.
+    When ``max_queue`` requests are already waiting, new ones are rejected
+    with ``SchedulerBusy`` right away.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 100):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+
+        self._waiters: dict[int, deque[asyncio.Future]] = {}
+        self._ready: deque[int] = deque()  # users with waiters and no request in flight
+        self._in_flight: set[int] = set()
+        self._queued = 0
+
+        self.stats = {
+            "started": 0,
+            "rejected": 0,
+        }
+
+    @property
+    def running(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @asynccontextmanager
+    async def slot(self, user_id: int) -> AsyncIterator[None]:
+        await self.acquire(user_id)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+    async def acquire(self, user_id: int) -> None:
+        if self._queued >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise SchedulerBusy(f"LLM queue is full ({self._queued} waiting)")
+
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(user_id, deque())
+        waiters.append(future)
+        self._queued += 1
+        if len(waiters) == 1 and user_id not in self._in_flight:
+            self._ready.append(user_id)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted right before cancellation - give it back
+                self.release(user_id)
+            else:
+                self._remove_waiter(user_id, future)
+            raise
+
+    def release(self, user_id: int) -> None:
+        self._in_flight.discard(user_id)
+        if self._waiters.get(user_id):
+            self._ready.append(user_id)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._ready and len(self._in_flight) < self.max_concurrency:
+            user_id = self._ready.popleft()
+            future = self._pop_waiter(user_id)
+            if future is None:
+                continue
+
+            self._in_flight.add(user_id)
+            self.stats["started"] += 1
+            future.set_result(None)
+
+    def _pop_waiter(self, user_id: int) -> asyncio.Future | None:
+        """Pop the oldest waiter of the user that is not cancelled yet."""
+        waiters = self._waiters.get(user_id)
+        future = None
+        while waiters:
+            candidate = waiters.popleft()
+            self._queued -= 1
+            if not candidate.cancelled():
+                future = candidate
+                break
+        if not waiters:
+            self._waiters.pop(user_id, None)
+        return future
+
+    def _remove_waiter(self, user_id: int, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(user_id)
+        if not waiters or future not in waiters:
+            return
+        waiters.remove(future)
+        self._queued -= 1
+        if not waiters:
+            del self._waiters[user_id]
+            try:
+                self._ready.remove(user_id)
+            except ValueError:
+                pass
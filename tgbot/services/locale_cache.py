@@ -0,0 +1,90 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from infrastructure.database.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LocaleCache:
+    """
+    Bounded cache of user locales.
+
+    Lookups go through a local LRU, then an optional Redis tier shared by
+    all bot instances, then ``User.language_code`` in the database.
+    Unregistered users get the fallback locale, kept in the local tier only.
+    With several replicas ``local_ttl`` limits how long a replica trusts
+    its local copy, the shared Redis tier is updated on every change.
+    """
+
+    def __init__(self,
+                 maxsize: int = 10000,
+                 redis: Optional[Redis] = None,
+                 ttl: int = 30 * 86400,
+                 local_ttl: Optional[float] = None,
+                 prefix: str = "locale"):
+        self.maxsize = maxsize
+        self.redis = redis
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.prefix = prefix
+        self._locales: OrderedDict[int, tuple[float, str]] = OrderedDict()
+
+        self.stats = {
+            "hits": 0,
+            "redis_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+        }
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    def _remember(self, user_id: int, locale: str) -> None:
+        expires_at = time.monotonic() + self.local_ttl if self.local_ttl else float("inf")
+        self._locales[user_id] = (expires_at, locale)
+        self._locales.move_to_end(user_id)
+        if len(self._locales) > self.maxsize:
+            self._locales.popitem(last=False)
+
+    async def get(self, user_id: int, fallback: str) -> str:
+        item = self._locales.get(user_id)
+        if item is not None and item[0] > time.monotonic():
+            self._locales.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return item[1]
+
+        if self.redis is not None:
+            try:
+                value = await self.redis.get(self._key(user_id))
+            except Exception as e:
+                logger.warning(f"Redis locale cache is not available: {e}")
+                value = None
+            if value is not None:
+                locale = value.decode() if isinstance(value, bytes) else value
+                self._remember(user_id, locale)
+                self.stats["redis_hits"] += 1
+                return locale
+
+        locale = await User.get_language_code(user_id)
+        if locale is not None:
+            self.stats["db_hits"] += 1
+            await self.set(user_id, locale)
+            return locale
+
+        self.stats["misses"] += 1
+        self._remember(user_id, fallback)
+        return fallback
+
+    async def set(self, user_id: int, locale: str) -> None:
+        """Update the cached locale, the database is updated by the caller."""
+        self._remember(user_id, locale)
+        if self.redis is not None:
+            try:
+                await self.redis.set(self._key(user_id), locale, ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"Redis locale cache is not available: {e}")
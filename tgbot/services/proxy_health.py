@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyHealthChecker:
+    """
+    Cached proxy health state.
+
+    The status is refreshed at most once per ``ttl`` seconds (ProxyPool
+    refreshes it in the background), so user requests read the cached
+    status instead of waiting for a check.
+    """
+
+    def __init__(self,
+                 proxy_url: str,
+                 ttl: float = 60.0,
+                 check_url: str = "https://httpbin.org/ip",
+                 timeout: float = 10.0):
+        self.proxy_url = proxy_url
+        self.ttl = ttl
+        self.check_url = check_url
+        self.timeout = timeout
+
+        self.healthy: Optional[bool] = None
+        self.checked_at = 0.0
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.healthy is not None and time.monotonic() - self.checked_at < self.ttl
+
+    async def is_healthy(self) -> bool:
+        """Return the cached status, checking the proxy only if it is stale."""
+        if self.is_fresh:
+            return self.healthy
+        async with self._lock:
+            if not self.is_fresh:
+                await self.refresh()
+        return self.healthy
+
+    async def refresh(self) -> bool:
+        self.healthy = await self._check()
+        self.checked_at = time.monotonic()
+        return self.healthy
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _check(self) -> bool:
+        if self._client is None:
+            self._client = httpx.AsyncClient(proxy=self.proxy_url, timeout=self.timeout)
+
+        try:
+            logger.info(f"🔍 Тестируем прокси подключение через {self.proxy_url}")
+
+            # Тестируем прокси с простым HTTP запросом
+            response = await self._client.get(self.check_url)
+
+            if response.status_code == 200:
+                ip_info = response.json()
+                logger.info(
+                    f"✅ Прокси работает! Внешний IP: {ip_info.get('origin', 'неизвестен')}")
+                return True
+            else:
+                logger.error(f"❌ Прокси вернул код {response.status_code}")
+                return False
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка тестирования прокси: {e}")
+            logger.error(f"❌ Тип ошибки: {type(e).__name__}")
+
+            # Детальная диагностика
+            if "ConnectTimeout" in str(e) or "timeout" in str(e).lower():
+                logger.error("⏰ Таймаут подключения - прокси не отвечает")
+            elif "ConnectError" in str(e) or "connection" in str(e).lower():
+                logger.error("🔌 Ошибка подключения - прокси недоступен")
+            elif "ProxyError" in str(e):
+                logger.error("🚫 Прокси отклонил подключение")
+            else:
+                logger.error(f"❓ Неизвестная ошибка: {e}")
+
+            logger.error("💡 Проверьте корректность PROXY_URL в .env файле")
+            return False
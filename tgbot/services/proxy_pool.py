@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Optional
+
+from tgbot.services.proxy_health import ProxyHealthChecker
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyPool:
+    """
+    Pool of outbound proxies for the AI clients.
+
+    Every proxy is checked in the background and scored by the error rate of
+    the real requests sent through it. Requests are spread round-robin over
+    the healthy proxies, so throughput grows with the number of proxies and
+    one broken proxy does not take the AI down.
+    """
+
+    def __init__(self,
+                 proxy_urls: list[str],
+                 ttl: float = 60.0,
+                 max_error_rate: float = 0.5,
+                 window: int = 20):
+        self.proxy_urls = []
+        for proxy_url in proxy_urls:
+            if proxy_url.startswith(('socks4://', 'socks5://')):
+                # gRPC клиент Gemini умеет работать только через HTTP CONNECT прокси
+                logger.warning(f"⚠️ SOCKS прокси не поддерживается и пропущен: {proxy_url}")
+                continue
+            if proxy_url.startswith('https://'):
+                logger.warning(
+                    "⚠️ Прокси URL использует https://, рекомендуется http://")
+                logger.warning("Пример: PROXY_URL=http://23.237.210.82:80")
+            self.proxy_urls.append(proxy_url)
+
+        self.ttl = ttl
+        self.max_error_rate = max_error_rate
+        self.checkers = {url: ProxyHealthChecker(url, ttl=ttl) for url in self.proxy_urls}
+        self.outcomes: dict[str, deque[bool]] = {
+            url: deque(maxlen=window) for url in self.proxy_urls}
+
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.proxy_urls)
+
+    def error_rate(self, proxy_url: str) -> float:
+        outcomes = self.outcomes[proxy_url]
+        if not outcomes:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def is_available(self, proxy_url: str) -> bool:
+        return (self.checkers[proxy_url].healthy is not False
+                and self.error_rate(proxy_url) < self.max_error_rate)
+
+    def choose(self) -> str:
+        """Pick the next healthy proxy, or the least bad one if none is healthy."""
+        if not self.proxy_urls:
+            raise ValueError("Proxy pool is empty")
+        candidates = [url for url in self.proxy_urls if self.is_available(url)]
+        if not candidates:
+            return min(self.proxy_urls, key=self.error_rate)
+        self._next += 1
+        return candidates[self._next % len(candidates)]
+
+    def report(self, proxy_url: str, ok: bool) -> None:
+        """Record the outcome of a request sent through the proxy."""
+        outcomes = self.outcomes.get(proxy_url)
+        if outcomes is not None:
+            outcomes.append(ok)
+
+    async def is_healthy(self) -> bool:
+        """True if at least one proxy passes the (cached) health check."""
+        results = await asyncio.gather(
+            *(checker.is_healthy() for checker in self.checkers.values()))
+        return any(results)
+
+    async def refresh(self) -> None:
+        await asyncio.gather(*(checker.refresh() for checker in self.checkers.values()))
+        for url, checker in self.checkers.items():
+            if checker.healthy and self.error_rate(url) >= self.max_error_rate:
+                # Прокси снова отвечает - даем ему еще один шанс на реальных запросах
+                self.outcomes[url].clear()
+        logger.info(f"Прокси доступны: {sum(map(self.is_available, self.proxy_urls))}"
+                    f"/{len(self.proxy_urls)}")
+
+    def start(self) -> None:
+        """Start refreshing the proxies in the background every ``ttl`` seconds."""
+        if self._task is None and self.proxy_urls:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*(checker.close() for checker in self.checkers.values()))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl)
+            await self.refresh()
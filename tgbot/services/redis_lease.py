@@ -0,0 +1,70 @@
+import asyncio
+import uuid
+from typing import Awaitable, Optional, TypeVar
+
+from redis.asyncio import Redis
+
+R = TypeVar("R")
+
+# Блокировку снимает и продлевает только ее владелец, проверка и действие атомарны
+RELEASE_LOCK = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+RENEW_LOCK = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class LeaseLost(Exception):
+    """Raised when the lease expired and another owner may have taken it."""
+
+
+class RedisLease:
+    """
+    Exclusive lease on a Redis key.
+
+    The key expires after ``ttl`` seconds unless the owner renews it, so a
+    crashed process holds the lease for at most ``ttl``. Only the owner can
+    renew or release it.
+    """
+
+    def __init__(self, redis: Redis, key: str, ttl: float = 30.0, token: Optional[str] = None):
+        self.redis = redis
+        self.key = key
+        self.ttl = ttl
+        self.token = token or uuid.uuid4().hex
+        self._release = redis.register_script(RELEASE_LOCK)
+        self._renew = redis.register_script(RENEW_LOCK)
+
+    async def acquire(self) -> bool:
+        return bool(await self.redis.set(self.key, self.token, nx=True, px=int(self.ttl * 1000)))
+
+    async def renew(self) -> bool:
+        return bool(await self._renew(keys=[self.key], args=[self.token, int(self.ttl * 1000)]))
+
+    async def release(self) -> None:
+        await self._release(keys=[self.key], args=[self.token])
+
+    async def hold(self, job: Awaitable[R]) -> R:
+        """
+        Run the job while renewing the lease every ``ttl / 3`` seconds.
+        If the lease is lost, the job is cancelled and LeaseLost is raised.
+        """
+        task = asyncio.ensure_future(job)
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=self.ttl / 3)
+                if done:
+                    return task.result()
+                if not await self.renew():
+                    raise LeaseLost(f"Lease {self.key} was lost")
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+# Chechen palochka is often typed as Latin I/l, digit 1 or a pipe.
+# Such characters are unified only next to a Cyrillic letter, so that
+# ordinary Latin text and numbers keep their meaning.
+_PALOCHKA_RE = re.compile(
+    r"(?<=[Ѐ-ӿ])[Ӏӏ1Il|]|[Ӏӏ1Il|](?=[Ѐ-ӿ])")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for cache keys: unify palochka variants,
+    collapse whitespace and fold case.
+    """
+    text = _PALOCHKA_RE.sub("ӏ", text)
+    return " ".join(text.split()).casefold()
+
+
+class TranslationCache:
+    """
+    Cache of translation answers keyed on (source lang, target lang, normalized text).
+
+    The first tier is an in-process LRU with TTL, the optional second tier
+    is Redis, which is shared between bot instances.
+    """
+
+    def __init__(self,
+                 maxsize: int = 10000,
+                 ttl: int = 86400,
+                 redis: Optional[Redis] = None,
+                 prefix: str = "translation_cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.redis = redis
+        self.prefix = prefix
+
+        self._local: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+        self.stats = {
+            "hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "sets": 0,
+        }
+
+    def make_key(self, src_lang: str, target_lang: str, text: str) -> str:
+        digest = hashlib.sha1(normalize_text(text).encode()).hexdigest()
+        return f"{self.prefix}:{src_lang}:{target_lang}:{digest}"
+
+    async def get(self, src_lang: str, target_lang: str, text: str) -> Optional[str]:
+        key = self.make_key(src_lang, target_lang, text)
+
+        value = self._get_local(key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+
+        if self.redis is not None:
+            try:
+                value = await self.redis.get(key)
+            except Exception as e:
+                logger.warning(f"Translation cache: redis get failed: {e}")
+                value = None
+            if value is not None:
+                if isinstance(value, bytes):
+                    value = value.decode()
+                self.stats["hits"] += 1
+                self.stats["redis_hits"] += 1
+                self._set_local(key, value)
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, src_lang: str, target_lang: str, text: str, value: str) -> None:
+        key = self.make_key(src_lang, target_lang, text)
+        self.stats["sets"] += 1
+        self._set_local(key, value)
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(key, value, ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"Translation cache: redis set failed: {e}")
+
+    def _get_local(self, key: str) -> Optional[str]:
+        item = self._local.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: str) -> None:
+        self._local[key] = (time.monotonic() + self.ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+class LimitedRequestHandler(SimpleRequestHandler):
+    """
+    Webhook handler with a cap on updates processed at the same time.
+
+    Updates are handled in the background. When ``max_in_flight`` updates
+    are in progress, the answer to Telegram is delayed until one of them
+    finishes, so Telegram slows down instead of tasks piling up in the bot.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_in_flight: int = 100, **kwargs: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, **kwargs)
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._background_feed_update_tasks)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        await self._slots.acquire()
+        try:
+            update = await request.json(loads=bot.session.json_loads)
+        except Exception:
+            self._slots.release()
+            raise
+
+        task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._on_done)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._background_feed_update_tasks.discard(task)
+        self._slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Webhook update failed", exc_info=task.exception())
+
+    async def close(self) -> None:
+        # Дожидаемся обновлений, которые уже приняты от Telegram
+        await asyncio.gather(*self._background_feed_update_tasks, return_exceptions=True)
+        await super().close()
+
+
+class WebhookServer:
+    """Receives updates from Telegram on ``http://host:port/path``."""
+
+    def __init__(self,
+                 dispatcher: Dispatcher,
+                 bot: Bot,
+                 url: str,
+                 secret_token: str,
+                 path: str = "/webhook",
+                 host: str = "0.0.0.0",
+                 port: int = 8080,
+                 max_in_flight: int = 100):
+        if not secret_token:
+            raise ValueError("Webhook requires a secret token")
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.url = url.rstrip("/") + path
+        self.path = path
+        self.host = host
+        self.port = port
+        self.secret_token = secret_token
+        self.max_in_flight = max_in_flight
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self, allowed_updates: Optional[list[str]] = None) -> None:
+        app = web.Application()
+        LimitedRequestHandler(self.dispatcher,
+                              self.bot,
+                              max_in_flight=self.max_in_flight,
+                              secret_token=self.secret_token).register(app, path=self.path)
+        setup_application(app, self.dispatcher, bot=self.bot)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+        await self.bot.set_webhook(self.url,
+                                   secret_token=self.secret_token,
+                                   allowed_updates=allowed_updates,
+                                   drop_pending_updates=False)
+        logger.info(f"Webhook is served on http://{self.host}:{self.port}{self.path}")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,107 @@
+"""
+Per-chat order of updates with ChatSerialMiddleware.
+
+An outer middleware registered before it awaits longer for earlier updates,
+the way LocalizationMiddleware may wait for Redis or the database. The check
+verifies that
+
+  * updates of one chat are still handled one at a time and in arrival order;
+  * different chats are handled in parallel, at most ``max_concurrency``;
+  * without ChatSerialMiddleware the same setup reorders the updates, so the
+    check does catch the problem.
+
+    python -m tools.chat_serial_check
+"""
+import asyncio
+import time
+from collections import defaultdict
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message, Update
+
+from tgbot.middlewares.chat_serial import ChatSerialMiddleware
+
+CHATS = 10
+MESSAGES_PER_CHAT = 10
+MAX_CONCURRENCY = 4
+
+
+class Stats:
+    def __init__(self):
+        self.seen = defaultdict(list)
+        self.running = defaultdict(int)
+        self.max_per_chat = 0
+        self.max_total = 0
+
+
+def message_update(update_id: int, chat_id: int, message_id: int) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {"message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+                    "text": str(message_id)},
+    })
+
+
+def make_dispatcher(stats: Stats, serial: bool) -> tuple[Dispatcher, ChatSerialMiddleware]:
+    dp = Dispatcher()
+
+    @dp.update.outer_middleware()
+    async def slow_locale(handler, event: Update, data):
+        # Ранние сообщения ждут дольше, без очереди поздние их обгоняют
+        await asyncio.sleep((MESSAGES_PER_CHAT - event.message.message_id) * 0.003)
+        return await handler(event, data)
+
+    chat_serial = ChatSerialMiddleware(max_concurrency=MAX_CONCURRENCY)
+    if serial:
+        chat_serial.setup(dp)
+
+    @dp.message()
+    async def handler(message: Message):
+        chat_id = message.chat.id
+        stats.running[chat_id] += 1
+        stats.max_per_chat = max(stats.max_per_chat, stats.running[chat_id])
+        stats.max_total = max(stats.max_total, sum(stats.running.values()))
+        try:
+            await asyncio.sleep(0.005)
+            stats.seen[chat_id].append(message.message_id)
+        finally:
+            stats.running[chat_id] -= 1
+
+    return dp, chat_serial
+
+
+async def run(serial: bool) -> tuple[Stats, ChatSerialMiddleware]:
+    stats = Stats()
+    dp, chat_serial = make_dispatcher(stats, serial)
+    bot = Bot("42:TEST")
+    # Как при polling: обновления по порядку, каждое в своей задаче
+    updates = [message_update(n * CHATS + chat + 1, 1000 + chat, n)
+               for n in range(MESSAGES_PER_CHAT) for chat in range(CHATS)]
+    await asyncio.gather(*(asyncio.create_task(dp.feed_update(bot, update)) for update in updates))
+    await bot.session.close()
+    return stats, chat_serial
+
+
+async def main() -> None:
+    expected = list(range(MESSAGES_PER_CHAT))
+
+    stats, chat_serial = await run(serial=True)
+    for chat_id, seen in stats.seen.items():
+        assert seen == expected, f"chat {chat_id}: {seen}"
+    assert stats.max_per_chat == 1, f"{stats.max_per_chat} updates of one chat at once"
+    assert 1 < stats.max_total <= MAX_CONCURRENCY, f"{stats.max_total} handlers at once"
+    assert chat_serial.waiting == chat_serial.running == 0 and not chat_serial._chats
+    print(f"serial: {CHATS * MESSAGES_PER_CHAT} updates in order, "
+          f"up to {stats.max_total} chats at once")
+
+    stats, _ = await run(serial=False)
+    reordered = sum(seen != expected for seen in stats.seen.values())
+    assert reordered, "the slow middleware did not reorder updates, the check proves nothing"
+    print(f"control: without ChatSerialMiddleware {reordered}/{CHATS} chats are reordered")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
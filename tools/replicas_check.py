@@ -0,0 +1,135 @@
+"""
+Two bot replicas sharing one (fake) Redis.
+
+Both replicas get updates of the same chats in random order of replicas,
+the way a load balancer spreads webhook calls. The check verifies that
+
+  * updates of one chat are handled one at a time and in update_id order,
+    and FSM data written on one replica is seen by the other;
+  * different chats are handled in parallel;
+  * parts of an album sent to different replicas reach one handler;
+  * a chat is not blocked forever by an update of a crashed replica.
+
+Needs ``pip install fakeredis``.
+
+    python -m tools.replicas_check
+"""
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+from aiogram import Bot, Dispatcher, F
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from aiogram.types import Message, Update
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from tgbot.middlewares.album_middleware import AlbumMiddleware
+from tgbot.middlewares.chat_order import ChatOrderMiddleware
+
+CHATS = 20
+MESSAGES_PER_CHAT = 15
+
+
+class Stats:
+    def __init__(self):
+        self.running = defaultdict(int)
+        self.max_per_chat = 0
+        self.max_total = 0
+        self.albums = []
+
+    def enter(self, chat_id: int) -> None:
+        self.running[chat_id] += 1
+        self.max_per_chat = max(self.max_per_chat, self.running[chat_id])
+        self.max_total = max(self.max_total, sum(self.running.values()))
+
+    def leave(self, chat_id: int) -> None:
+        self.running[chat_id] -= 1
+
+
+def make_replica(server: FakeServer, stats: Stats) -> Dispatcher:
+    redis = FakeRedis(server=server, max_connections=1000)
+    storage = RedisStorage(redis, key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True))
+    dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(ChatOrderMiddleware(redis, lease=2))
+    dp.message.middleware(AlbumMiddleware(latency=0.2, redis=redis))
+
+    @dp.message(F.media_group_id)
+    async def album_handler(message: Message, album: list[Message]):
+        stats.albums.append([part.message_id for part in album])
+
+    @dp.message()
+    async def text_handler(message: Message, state: FSMContext):
+        stats.enter(message.chat.id)
+        try:
+            seen = (await state.get_data()).get("seen", [])
+            await asyncio.sleep(random.uniform(0.001, 0.01))
+            await state.update_data(seen=seen + [int(message.text)])
+        finally:
+            stats.leave(message.chat.id)
+
+    return dp
+
+
+def message_update(update_id: int, chat_id: int, message_id: int, **fields) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {"message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+                    **fields},
+    })
+
+
+async def main() -> None:
+    server = FakeServer()
+    stats = Stats()
+    replicas = [make_replica(server, stats), make_replica(server, stats)]
+    bot = Bot("42:TEST")
+
+    async def deliver(dp: Dispatcher, update: Update, delay: float):
+        await asyncio.sleep(delay)
+        await dp.feed_update(bot, update)
+
+    # Telegram отдает обновления по порядку, балансировщик раскидывает их по репликам
+    updates = [message_update(n * CHATS + chat + 1, 1000 + chat, n + 1, text=str(n))
+               for n in range(MESSAGES_PER_CHAT) for chat in range(CHATS)]
+    started = time.monotonic()
+    await asyncio.gather(*(deliver(random.choice(replicas), update, i * 0.0005)
+                           for i, update in enumerate(updates)))
+    elapsed = time.monotonic() - started
+
+    storage = replicas[0].storage
+    for chat in range(CHATS):
+        chat_id = 1000 + chat
+        key = replicas[0].fsm.get_context(bot, chat_id, chat_id).key
+        seen = (await storage.get_data(key)).get("seen", [])
+        assert seen == list(range(MESSAGES_PER_CHAT)), f"chat {chat_id}: {seen}"
+    assert stats.max_per_chat == 1, f"{stats.max_per_chat} updates of one chat at once"
+    assert stats.max_total > 1, "chats were not handled in parallel"
+    print(f"ordering: {len(updates)} updates of {CHATS} chats in {elapsed:.2f} s, "
+          f"up to {stats.max_total} chats at once")
+
+    album = [message_update(10_000 + i, 5000, 100 + i, media_group_id="g1",
+                            photo=[{"file_id": f"p{i}", "file_unique_id": f"u{i}", "width": 1, "height": 1}])
+             for i in range(3)]
+    await asyncio.gather(*(deliver(replicas[i % 2], update, i * 0.01) for i, update in enumerate(album)))
+    assert stats.albums == [[100, 101, 102]], stats.albums
+    print("album: 3 parts on 2 replicas handled once")
+
+    # Обновление упавшей реплики: запись в очереди чата с истекшей арендой
+    redis = FakeRedis(server=server, max_connections=1000)
+    queue_key = f"chat_order:{bot.id}:6000"
+    await redis.zadd(queue_key, {"1": 1})
+    await redis.hset(f"{queue_key}:lease", "1", time.time() - 1)
+    await asyncio.wait_for(replicas[0].feed_update(bot, message_update(20_000, 6000, 1, text="0")), 5)
+    print("lease: chat released after a crashed replica")
+
+    await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())